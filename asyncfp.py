@@ -0,0 +1,172 @@
+"""Async counterparts of the iteration helpers in `fp`.
+
+These work on `AsyncIterable`s (async generators and the like), and also accept
+regular iterables so that the same code can handle both. Callbacks may be regular
+functions or coroutine functions; if a callback returns an awaitable, it is awaited.
+"""
+import asyncio
+import collections
+import inspect
+from typing import *
+from .fp import Pacer, _pacer
+from .modutil import Includer
+
+__all__ = (include := Includer())
+
+async def _resolve(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+async def _aiter(seq: AsyncIterable | Iterable) -> AsyncIterator:
+    if isinstance(seq, AsyncIterable):
+        async for value in seq:
+            yield value
+    else:
+        for value in seq:
+            yield value
+
+@include
+async def first(seq: AsyncIterable | Iterable, filter=None) -> Any | None:
+    async for value in _aiter(seq):
+        if not callable(filter) or await _resolve(filter(value)):
+            return value
+    return None
+
+@include
+async def nth(n: int, seq: AsyncIterable | Iterable) -> Any | None:
+    """The `n`th item of `seq`, or None if there are fewer items.
+
+    A negative `n` counts from the end, like with `fp.nth`, which consumes all of
+    `seq` but only holds the last `-n` items.
+    """
+    if n < 0:
+        last = collections.deque(maxlen=-n)
+        async for value in _aiter(seq):
+            last.append(value)
+        return last[0] if len(last) == -n else None
+    i = 0
+    async for value in _aiter(seq):
+        if i == n:
+            return value
+        i += 1
+    return None
+
+@include
+async def count(seq: AsyncIterable | Iterable, filter=None) -> int:
+    total = 0
+    async for value in _aiter(seq):
+        if not callable(filter) or await _resolve(filter(value)):
+            total += 1
+    return total
+
+@include
+async def do(action: Callable, seq: AsyncIterable | Iterable, unpack: bool = True, limit: int = None):
+    """Do `action(item)` for every `item` in `seq`.
+
+    If `action` returns an awaitable it is awaited. With `limit`, up to `limit` actions
+    run concurrently, and no more items are pulled from `seq` while that many are in
+    flight. The first exception raised by an action cancels the rest and is raised.
+    """
+    def call(item):
+        if isinstance(item, tuple) and unpack:
+            return action(*item)
+        return action(item)
+    if limit is None:
+        async for item in _aiter(seq):
+            await _resolve(call(item))
+        return
+    if limit < 1:
+        raise ValueError(f'limit must be at least 1: {limit}')
+    semaphore = asyncio.Semaphore(limit)
+    pending = set()
+    failure = None
+    def done(task: asyncio.Task):
+        nonlocal failure
+        pending.discard(task)
+        semaphore.release()
+        if not task.cancelled() and task.exception() is not None and failure is None:
+            failure = task.exception()
+    try:
+        async for item in _aiter(seq):
+            await semaphore.acquire()
+            if failure is not None:
+                break
+            task = asyncio.ensure_future(_resolve(call(item)))
+            pending.add(task)
+            task.add_done_callback(done)
+        if pending and failure is None:
+            await asyncio.wait(set(pending), return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        if pending:
+            remaining = set(pending)
+            for task in remaining:
+                task.cancel()
+            await asyncio.gather(*remaining, return_exceptions=True)
+    if failure is not None:
+        raise failure
+
+@include
+async def filternone(seq: AsyncIterable | Iterable) -> AsyncIterator:
+    """Filter out elements that are None."""
+    async for value in _aiter(seq):
+        if value is not None:
+            yield value
+
+@include
+async def filtertype(_type: Type, seq: AsyncIterable | Iterable) -> AsyncIterator:
+    async for value in _aiter(seq):
+        if isinstance(value, _type):
+            yield value
+
+@include
+async def next_or(it: AsyncIterator, default: Any = None):
+    try:
+        return await anext(it)
+    except StopAsyncIteration:
+        return default
+
+@include
+async def yieldcall(callback: Callable[..., Any], *args, **kwargs) -> AsyncIterator:
+    while True:
+        yield await _resolve(callback(*args, **kwargs))
+
+@include
+async def yieldpaced(
+        callback: Callable[..., Any],
+        *args,
+        pace: Pacer | float = 1.0,
+        until: Callable[[Any], bool] = None,
+        stop: asyncio.Event = None,
+        **kwargs,
+    ) -> AsyncIterator:
+    """The asyncio version of `fp.yieldpaced`. `stop` is an `asyncio.Event`."""
+    pacer = _pacer(pace)
+    while stop is None or not stop.is_set():
+        result = await _resolve(callback(*args, **kwargs))
+        yield result
+        if until is not None and until(result):
+            return
+        delay = pacer.next(result)
+        if stop is not None:
+            try:
+                await asyncio.wait_for(stop.wait(), delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(delay)
+
+@include
+async def repeatpaced(
+        callback: Callable[..., Any],
+        *args,
+        pace: Pacer | float = 1.0,
+        until: Callable[[Any], bool] = None,
+        stop: asyncio.Event = None,
+        **kwargs,
+    ):
+    """The asyncio version of `fp.repeatpaced`. Returns the last result."""
+    result = None
+    async for result in yieldpaced(callback, *args, pace=pace, until=until, stop=stop, **kwargs):...
+    return result
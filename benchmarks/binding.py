@@ -0,0 +1,83 @@
+"""Calls per second of the argument binding helpers, before and after their fast paths.
+
+The "before" versions are copies of the original implementations.
+
+Run with:
+```
+python -m toolbox.benchmarks.binding
+```
+"""
+import timeit
+from functools import wraps
+from .. import fp
+from ..decorators import Alias, params
+
+def _prefixargs_before(fn, *prefix_args, **prefix_kwargs):
+    @wraps(fn)
+    def wrapped(*args, **kwargs):
+        return fn(*(*prefix_args, *args), **{**prefix_kwargs, **kwargs})
+    return wrapped
+
+def _appendargs_before(fn, *post_args, **post_kwargs):
+    @wraps(fn)
+    def wrapped(*args, **kwargs):
+        return fn(*(*args, *post_args), **{**kwargs, **post_kwargs})
+    return wrapped
+
+class _AliasBefore(Alias):
+    __slots__ = ()
+    def __call__(self, *args, **kwargs):
+        return self.target(*(*self.args, *args), **{**self.kwargs, **kwargs})
+
+class _ParamsBefore(params):
+    __slots__ = ()
+    def invoke(self, fn):
+        return fn(*self.args, **self.kwargs)
+
+def target(a, b, c=0, d=0):
+    return a
+
+def main(number: int = 200_000, repeat: int = 5):
+    cases = {
+        'prefixargs positional': (
+            lambda: _prefixargs_before(target, 1),
+            lambda: fp.prefixargs(target, 1),
+            lambda f: f(2),
+        ),
+        'prefixargs with kwargs': (
+            lambda: _prefixargs_before(target, 1, c=3),
+            lambda: fp.prefixargs(target, 1, c=3),
+            lambda f: f(2, d=4),
+        ),
+        'appendargs positional': (
+            lambda: _appendargs_before(target, 2),
+            lambda: fp.appendargs(target, 2),
+            lambda f: f(1),
+        ),
+        'Alias positional': (
+            lambda: _AliasBefore(target, 1),
+            lambda: Alias(target, 1),
+            lambda f: f(2),
+        ),
+        'Alias bound kwargs': (
+            lambda: _AliasBefore(target, 1, c=3),
+            lambda: Alias(target, 1, c=3),
+            lambda f: f(2),
+        ),
+        'params.invoke positional': (
+            lambda: _ParamsBefore(1, 2).invoke,
+            lambda: params(1, 2).invoke,
+            lambda f: f(target),
+        ),
+    }
+    print(f'{"case":<28} {"before":>14} {"after":>14} {"speedup":>8}')
+    for name, (before, after, call) in cases.items():
+        rates = []
+        for make in (before, after):
+            fn = make()
+            best = min(timeit.repeat(lambda: call(fn), number=number, repeat=repeat))
+            rates.append(number / best)
+        print(f'{name:<28} {rates[0]/1e6:10.2f} M/s {rates[1]/1e6:10.2f} M/s {rates[1]/rates[0]:7.2f}x')
+
+if __name__ == '__main__':
+    main()
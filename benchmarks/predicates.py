@@ -0,0 +1,33 @@
+"""Compares `fp.matchall` against the compiled `predicate.matchall`.
+
+Run with:
+```
+python -m toolbox.benchmarks.predicates
+```
+"""
+import timeit
+from .. import fp, predicate
+
+def main(size: int = 100_000, repeat: int = 5):
+    allowed = set(range(0, 1000, 3))
+    records = [i % 1200 for i in range(size)]
+    interpreted = fp.matchall(fp.eq(3), fp.lt(10), fp.present(allowed))
+    compiled = predicate.matchall(fp.eq(3), fp.lt(10), fp.present(allowed))
+    # Passes the first check for almost every record, so all three checks run.
+    mostly_true = fp.matchall(fp.ne(3), fp.lt(10), fp.present(allowed))
+    mostly_true_compiled = predicate.matchall(fp.ne(3), fp.lt(10), fp.present(allowed))
+    assert list(filter(interpreted, records)) == list(filter(compiled, records))
+    assert list(filter(mostly_true, records)) == list(filter(mostly_true_compiled, records))
+    cases = {
+        'fp.matchall(eq, lt, present)': interpreted,
+        'predicate.matchall(...)': compiled,
+        'predicate.matchall(...).function': compiled.function,
+        'fp.matchall(ne, lt, present)': mostly_true,
+        'predicate.matchall(ne, ...).function': mostly_true_compiled.function,
+    }
+    for name, check in cases.items():
+        best = min(timeit.repeat(lambda: sum(1 for _ in filter(check, records)), number=1, repeat=repeat))
+        print(f'{name:<40} {best * 1000:8.2f} ms  {size / best / 1e6:6.2f} M records/s')
+
+if __name__ == '__main__':
+    main()
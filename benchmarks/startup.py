@@ -0,0 +1,59 @@
+"""Measures how long `from toolbox.interactive import *` takes in a fresh interpreter.
+
+The peak resident memory is from `resource`, so this only runs on Unix.
+`--eager` imports the modules that the prelude loads lazily (json, numpy, requests
+and pyperclip) first, which is what the import used to cost.
+
+Run with:
+```
+python -m toolbox.benchmarks.startup
+python -m toolbox.benchmarks.startup --eager
+```
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+_LAZY = ('json', 'numpy', 'requests', 'pyperclip')
+
+_SCRIPT = '''
+import time, resource
+start = time.perf_counter()
+for name in {eager!r}:
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+from {package}.interactive import *
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+def measure(eager: bool, runs: int) -> tuple[list[float], list[int]]:
+    package = __package__.rpartition('.')[0]
+    script = _SCRIPT.format(eager=_LAZY if eager else (), package=package)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, sys.path)))
+    times, peaks = [], []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', script], env=env, check=True, capture_output=True, text=True).stdout
+        elapsed, peak = output.split()
+        times.append(float(elapsed))
+        peaks.append(int(peak))
+    return times, peaks
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m toolbox.benchmarks.startup')
+    parser.add_argument('--eager', action='store_true', help='Import the lazily loaded modules up front.')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args(argv)
+    times, peaks = measure(args.eager, args.runs)
+    label = 'eager' if args.eager else 'lazy'
+    print(
+        f'{label}: median {statistics.median(times) * 1000:.1f} ms, '
+        f'min {min(times) * 1000:.1f} ms, max RSS {statistics.median(peaks) / 1024:.1f} MiB'
+    )
+
+if __name__ == '__main__':
+    main()
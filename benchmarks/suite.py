@@ -0,0 +1,236 @@
+"""A reproducible benchmark suite for the hot entry points of the toolbox.
+
+Every case is timed at several input sizes. Each measurement is warmed up, then
+repeated, and every sample is the mean time per call over enough calls to take
+at least `--min-time` seconds. Results are written as JSON, and can be compared
+against a saved baseline, where a case counts as a regression if it is slower by
+more than `--threshold` and a Mann-Whitney U test says the difference is significant.
+
+Run with:
+```
+python -m toolbox.benchmarks.suite --save-baseline baseline.json
+python -m toolbox.benchmarks.suite --output results.json --baseline baseline.json
+```
+The exit code is 1 if any regressions were found, so it can be used in CI.
+"""
+import argparse
+import json
+import math
+import platform
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import *
+from .. import fp, predicate
+from ..container import attrdict
+from ..decorators import Alias
+from ..modutil import Includer
+from ..parsing import parse
+
+# name -> (setup, sizes). `setup(size)` returns the zero-argument callable to time.
+cases: Dict[str, Tuple[Callable[[int], Callable[[], Any]], Tuple[int, ...]]] = {}
+
+def case(name: str, sizes: Tuple[int, ...]):
+    """Registers a benchmark case."""
+    def register(setup: Callable[[int], Callable[[], Any]]):
+        cases[name] = (setup, sizes)
+        return setup
+    return register
+
+def _stage(*args, **kwargs):
+    return args
+
+@case('fp.callstack', sizes=(1, 4, 16))
+def _(size):
+    return fp.callstack(lambda: (1, 2), *([_stage, (3,)] * size))
+
+@case('fp.callstack(compile=True)', sizes=(1, 4, 16))
+def _(size):
+    return fp.callstack(lambda: (1, 2), *([_stage, (3,)] * size), compile=True)
+
+@case('fp.matchall', sizes=(1, 4, 16))
+def _(size):
+    check = fp.matchall(*([fp.lt(0), fp.present({1, 2, 3})] * size))
+    return lambda: check(2)
+
+@case('predicate.matchall', sizes=(1, 4, 16))
+def _(size):
+    check = predicate.matchall(*([fp.lt(0), fp.present({1, 2, 3})] * size)).function
+    return lambda: check(2)
+
+@case('fp.prefixargs', sizes=(0, 2, 8))
+def _(size):
+    call = fp.prefixargs(_stage, *range(size))
+    return lambda: call(1, 2)
+
+@case('decorators.Alias.__call__', sizes=(0, 2, 8))
+def _(size):
+    call = Alias(_stage, *range(size), key='value')
+    return lambda: call(1, 2)
+
+@case('container.attrdict access', sizes=(10, 1_000, 100_000))
+def _(size):
+    d = attrdict({f'key{i}': i for i in range(size)})
+    d.target = 1
+    return lambda: d.target
+
+@case('parsing.parse.splitpositions', sizes=(100, 10_000, 1_000_000))
+def _(size):
+    text = ('word,' * (size // 5 + 1))[:size]
+    return lambda: sum(1 for _ in parse.splitpositions(text, ','))
+
+@case('parsing.parse.splitlines', sizes=(100, 10_000, 1_000_000))
+def _(size):
+    text = ('a line\n' * (size // 7 + 1))[:size]
+    return lambda: sum(1 for _ in parse.splitlines(text))
+
+@case('modutil.Includer.append', sizes=(10, 1_000, 100_000))
+def _(size):
+    def target():...
+    def build():
+        includer = Includer()
+        for _ in range(size):
+            includer.append(target)
+    return build
+
+def measure(fn: Callable[[], Any], repeats: int, min_time: float, warmup: float) -> dict:
+    """Times `fn` and returns the samples (seconds per call) and their summary."""
+    timer = time.perf_counter
+    # Warm up caches and find how many calls it takes to fill `min_time`.
+    number = 1
+    deadline = timer() + warmup
+    while True:
+        start = timer()
+        for _ in range(number):
+            fn()
+        elapsed = timer() - start
+        if elapsed >= min_time and timer() >= deadline:
+            break
+        if elapsed < min_time:
+            number *= 2 if elapsed == 0 else max(2, min(10, math.ceil(min_time / elapsed)))
+    samples = []
+    for _ in range(repeats):
+        start = timer()
+        for _ in range(number):
+            fn()
+        samples.append((timer() - start) / number)
+    return {
+        'number': number,
+        'samples': samples,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+def run(pattern: str = '', repeats: int = 10, min_time: float = 0.05, warmup: float = 0.1, log: TextIO | None = sys.stderr) -> dict:
+    """Runs every case whose name matches the regex `pattern` at each of its sizes."""
+    results = {}
+    for name, (setup, sizes) in cases.items():
+        if not re.search(pattern, name):
+            continue
+        for size in sizes:
+            key = f'{name}[{size}]'
+            results[key] = measure(setup(size), repeats, min_time, warmup)
+            if log is not None:
+                print(f'{key:<48} {results[key]["median"] * 1e6:12.3f} us', file=log)
+    return {
+        'meta': {
+            'python': sys.version,
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'repeats': repeats,
+            'min_time': min_time,
+        },
+        'results': results,
+    }
+
+def mannwhitney(a: Sequence[float], b: Sequence[float]) -> float:
+    """Two-sided p-value of the Mann-Whitney U test, using the normal approximation with a tie correction."""
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return 1.0
+    ranked = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+    ranks = [0.0] * len(ranked)
+    ties = 0.0
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties += (j - i + 1) ** 3 - (j - i + 1)
+        i = j + 1
+    r1 = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 0)
+    u = r1 - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2) / math.sqrt(variance)
+    return 2 * (1 - statistics.NormalDist().cdf(abs(z)))
+
+def compare(current: dict, baseline: dict, threshold: float = 0.05, alpha: float = 0.01) -> List[dict]:
+    """Compares the cases that are in both results, and returns one row per case."""
+    rows = []
+    for key, result in current['results'].items():
+        if (base := baseline['results'].get(key)) is None:
+            continue
+        ratio = result['median'] / base['median'] if base['median'] else math.inf
+        p = mannwhitney(result['samples'], base['samples'])
+        significant = p < alpha
+        rows.append({
+            'case': key,
+            'baseline': base['median'],
+            'current': result['median'],
+            'ratio': ratio,
+            'p': p,
+            'regression': significant and ratio > 1 + threshold,
+            'improvement': significant and ratio < 1 - threshold,
+        })
+    return rows
+
+def report(rows: List[dict]) -> str:
+    lines = [f'{"case":<48} {"baseline us":>12} {"current us":>12} {"ratio":>7} {"p":>8}']
+    for row in rows:
+        flag = ' REGRESSION' if row['regression'] else ' improved' if row['improvement'] else ''
+        lines.append(
+            f'{row["case"]:<48} {row["baseline"] * 1e6:12.3f} {row["current"] * 1e6:12.3f} '
+            f'{row["ratio"]:7.3f} {row["p"]:8.4f}{flag}'
+        )
+    return '\n'.join(lines)
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m toolbox.benchmarks.suite', description=__doc__.split('\n\n')[0])
+    parser.add_argument('-k', '--pattern', default='', help='Only run cases matching this regex.')
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--min-time', type=float, default=0.05, help='Minimum seconds per sample.')
+    parser.add_argument('--warmup', type=float, default=0.1, help='Seconds of warmup per measurement.')
+    parser.add_argument('-o', '--output', help='Write the results to this JSON file.')
+    parser.add_argument('--baseline', help='Compare against the results in this JSON file.')
+    parser.add_argument('--save-baseline', help='Write the results to this JSON file to use as a baseline.')
+    parser.add_argument('--threshold', type=float, default=0.05, help='Slowdown that counts as a regression (0.05 is 5%%).')
+    parser.add_argument('--alpha', type=float, default=0.01, help='Significance level.')
+    args = parser.parse_args(argv)
+    if args.repeats < 2:
+        parser.error('--repeats must be at least 2.')
+    results = run(args.pattern, args.repeats, args.min_time, args.warmup)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        rows = compare(results, baseline, args.threshold, args.alpha)
+        print(report(rows))
+        if any(row['regression'] for row in rows):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
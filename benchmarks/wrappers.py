@@ -0,0 +1,55 @@
+"""Compares the call overhead of stacked `*args, **kwargs` wrappers against generated ones.
+
+Run with:
+```
+python -m toolbox.benchmarks.wrappers
+```
+"""
+import timeit
+from functools import wraps
+from .. import fp
+from ..decorators import decorator, hooks
+
+def _allow(a, b, c=3):
+    return True
+
+@decorator
+def packed(target):
+    @wraps(target)
+    def wrapper(*args, **kwargs):
+        if _allow(*args, **kwargs):
+            return target(*args, **kwargs)
+    return wrapper
+
+@decorator
+def generated(target):
+    return hooks(guard=_allow)
+
+def target(a, b, c=3):
+    return a
+
+def stack(decorate, depth: int):
+    fn = target
+    for _ in range(depth):
+        fn = decorate(fn)
+    return fn
+
+def main(number: int = 200_000, repeat: int = 5):
+    for depth in (1, 3, 5):
+        cases = {
+            'plain': target,
+            '*args, **kwargs': stack(packed, depth),
+            'decorators.hooks': stack(generated, depth),
+            'fp.conditional': stack(fp.conditional(_allow), depth),
+            'fp.conditional(exact=True)': stack(fp.conditional(_allow, exact=True), depth),
+        }
+        baseline = None
+        for name, fn in cases.items():
+            assert fn(1, 2, c=4) == 1
+            best = min(timeit.repeat(lambda: fn(1, 2, c=4), number=number, repeat=repeat)) / number
+            baseline = baseline or best
+            print(f'{depth} x {name:<28} {best * 1e9:8.1f} ns/call  {best / baseline:5.2f}x plain')
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -7,10 +7,19 @@ from typing_extensions import Self
 from collections import (
     defaultdict,
     ChainMap,
+    OrderedDict,
     UserDict,
 )
 from collections.abc import MutableMapping, Mapping
-from .modutil import Includer
+import array
+import bisect
+import itertools
+import math
+import operator
+import sys
+import threading
+import time
+from .modutil import Includer, is_loaded
 
 __all__ = (include := Includer())
 
@@ -75,4 +84,487 @@ class attrmappingproxy:
         self.________ATTRMAPPINGPROXY_MAPPING.__setitem__(name, value)
     
     def __delattr__(self, name: str):
-        self.________ATTRMAPPINGPROXY_MAPPING.__delitem__(name)
\ No newline at end of file
+        self.________ATTRMAPPINGPROXY_MAPPING.__delitem__(name)
+
+@include
+class LazySeq:
+    """A sequence over an iterator that pulls items in chunks and remembers what it has pulled.
+
+    Items are only pulled from the iterator when they are asked for, and they are
+    cached so that indexing and slicing data that has already been seen is O(1)
+    and does not touch the iterator again.
+    ```py
+    >>> squares = LazySeq(i * i for i in itertools.count())
+    >>> squares[10]
+    100
+    >>> squares[3:6]
+    [9, 16, 25]
+    ```
+    Chunks are stored as tuples, or as `array.array` when a `typecode` is given
+    for more compact storage of numbers.
+
+    Setting `maxchunks` bounds the memory used: once more than `maxchunks` chunks
+    have been pulled, the oldest chunk is dropped, or if `spill` is set, written
+    to a temporary file and read back when it is needed again. Accessing an item
+    from a dropped chunk raises an `IndexError`.
+
+    Negative indices and `length()` need to know where the iterator ends, so they
+    pull the remainder of the iterator.
+    """
+    __slots__ = (
+        '_iterator', '_chunksize', '_typecode', '_maxchunks',
+        '_chunks', '_first', '_size', '_exhausted', '_spillfile', '_spilled',
+    )
+
+    def __init__(
+            self,
+            iterable: Iterable,
+            chunksize: int = 1024,
+            typecode: str = None,
+            maxchunks: int = None,
+            spill: bool = False,
+        ):
+        if chunksize < 1:
+            raise ValueError(f'chunksize must be at least 1: {chunksize}')
+        if maxchunks is not None and maxchunks < 1:
+            raise ValueError(f'maxchunks must be at least 1: {maxchunks}')
+        self._iterator = iter(iterable)
+        self._chunksize = chunksize
+        self._typecode = typecode
+        self._maxchunks = maxchunks
+        # Chunk number `self._first + i` is stored at `self._chunks[i]`.
+        self._chunks = []
+        self._first = 0
+        self._size = 0
+        self._exhausted = False
+        self._spillfile = None
+        if spill and maxchunks is not None:
+            # Imported here, so that importing this module doesn't pay for what only spilling needs.
+            import tempfile
+            self._spillfile = tempfile.TemporaryFile()
+        # Chunk number -> (offset, length) in the spill file.
+        self._spilled = {}
+
+    @property
+    def seen(self) -> int:
+        """The number of items that have been pulled from the iterator so far."""
+        return self._size
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the iterator has been fully consumed."""
+        return self._exhausted
+
+    def _pull(self) -> bool:
+        """Pulls the next chunk from the iterator. Returns False if there was nothing left."""
+        if self._exhausted:
+            return False
+        items = itertools.islice(self._iterator, self._chunksize)
+        chunk = array.array(self._typecode, items) if self._typecode else tuple(items)
+        if len(chunk) < self._chunksize:
+            self._exhausted = True
+            if not chunk:
+                return False
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        if self._maxchunks is not None and len(self._chunks) > self._maxchunks:
+            dropped = self._chunks.pop(0)
+            if self._spillfile is not None:
+                import io, pickle
+                data = pickle.dumps(dropped, pickle.HIGHEST_PROTOCOL)
+                offset = self._spillfile.seek(0, io.SEEK_END)
+                self._spillfile.write(data)
+                self._spilled[self._first] = (offset, len(data))
+            self._first += 1
+        return True
+
+    def _drain(self):
+        while self._pull():...
+
+    def _chunk(self, number: int) -> Sequence:
+        """Gets a chunk by number, pulling from the iterator if needed. Raises IndexError if it doesn't exist."""
+        while number >= self._first + len(self._chunks):
+            if not self._pull():
+                raise IndexError('LazySeq index out of range')
+        if number >= self._first:
+            return self._chunks[number - self._first]
+        if number in self._spilled:
+            import pickle
+            offset, length = self._spilled[number]
+            self._spillfile.seek(offset)
+            return pickle.loads(self._spillfile.read(length))
+        raise IndexError(f'LazySeq chunk {number} was dropped (maxchunks={self._maxchunks})')
+
+    def _item(self, index: int):
+        if index < 0:
+            self._drain()
+            index += self._size
+            if index < 0:
+                raise IndexError('LazySeq index out of range')
+        number, offset = divmod(index, self._chunksize)
+        chunk = self._chunk(number)
+        if offset >= len(chunk):
+            raise IndexError('LazySeq index out of range')
+        return chunk[offset]
+
+    def _slice(self, key: slice) -> list:
+        if (key.start or 0) < 0 or key.stop is None or key.stop < 0 or (key.step or 1) < 0:
+            self._drain()
+        elif key.stop > 0:
+            # Only pull as far as the slice reaches.
+            self.get(key.stop - 1)
+        start, stop, step = key.indices(self._size)
+        if step != 1:
+            return [self._item(i) for i in range(start, stop, step)]
+        result = []
+        while start < stop:
+            number, offset = divmod(start, self._chunksize)
+            chunk = self._chunk(number)
+            result.extend(chunk[offset:offset + stop - start])
+            start += self._chunksize - offset
+        return result
+
+    @overload
+    def __getitem__(self, index: int) -> Any:...
+    @overload
+    def __getitem__(self, index: slice) -> list:...
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._slice(index)
+        return self._item(operator.index(index))
+
+    def get(self, index: int, default: Any = None) -> Any:
+        """Like `__getitem__`, but returns `default` if the item doesn't exist."""
+        try:
+            return self._item(index)
+        except IndexError:
+            return default
+
+    def length(self) -> int:
+        """Pulls the rest of the iterator and returns the total number of items."""
+        self._drain()
+        return self._size
+
+    def __iter__(self) -> Iterator:
+        number = 0
+        while True:
+            try:
+                chunk = self._chunk(number)
+            except IndexError:
+                if number < self._first + len(self._chunks):
+                    # The chunk was dropped, so let the error through.
+                    raise
+                return
+            yield from chunk
+            number += 1
+
+    def __repr__(self) -> str:
+        state = 'exhausted' if self._exhausted else 'pending'
+        return f'<LazySeq seen={self._size} {state}>'
+
+_MASK64 = (1 << 64) - 1
+
+def _mix64(value: Hashable) -> int:
+    """Spreads the bits of `hash(value)` over a 64-bit integer (splitmix64 finalizer).
+
+    Python's `hash` is the identity for small integers, which would put the keys of
+    a Bloom filter in neighbouring bits.
+    """
+    h = hash(value) & _MASK64
+    h = ((h ^ (h >> 30)) * 0xbf58476d1ce4e5b9) & _MASK64
+    h = ((h ^ (h >> 27)) * 0x94d049bb133111eb) & _MASK64
+    return h ^ (h >> 31)
+
+def _sorted_hashes(items: Iterable[Hashable]) -> array.array:
+    """`_mix64` of every item, sorted and without duplicates, computed with NumPy."""
+    import numpy
+    h = numpy.fromiter(map(hash, items), dtype=numpy.int64).view(numpy.uint64)
+    # The same steps as `_mix64`, where the multiplications wrap around at 64 bits.
+    with numpy.errstate(over='ignore'):
+        h = (h ^ (h >> numpy.uint64(30))) * numpy.uint64(0xbf58476d1ce4e5b9)
+        h = (h ^ (h >> numpy.uint64(27))) * numpy.uint64(0x94d049bb133111eb)
+        h ^= h >> numpy.uint64(31)
+    h.sort()
+    if len(h):
+        h = h[numpy.concatenate(([True], h[1:] != h[:-1]))]
+    hashes = array.array('Q')
+    hashes.frombytes(h.tobytes())
+    return hashes
+
+@include
+class BloomFilter:
+    """A probabilistic set that uses a fixed amount of memory.
+
+    Membership checks never give false negatives, but may give false positives
+    at roughly `error_rate` once `capacity` items have been added.
+    If `capacity` is not given, it's taken from the length of `items`.
+    ```py
+    >>> blocked = BloomFilter(blocklist, error_rate=0.001)
+    >>> 'example.com' in blocked
+    True
+    >>> blocked.stats()
+    {'entries': 1000000, 'bytes': 1797256, 'hashes': 10, 'error_rate': 0.001, 'false_positive_rate': 0.0010000247179482108}
+    ```
+    """
+    __slots__ = ('bits', 'size', 'hashes', 'capacity', 'error_rate', 'count')
+
+    def __init__(self, items: Iterable[Hashable] = (), capacity: int = None, error_rate: float = 0.01):
+        if not 0 < error_rate < 1:
+            raise ValueError(f'error_rate must be between 0 and 1: {error_rate}')
+        if capacity is None:
+            items = items if isinstance(items, Sized) else list(items)
+            capacity = len(items)
+        capacity = max(capacity, 1)
+        # Optimal number of bits and hash functions for the capacity and error rate.
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.count = 0
+        for item in items:
+            self.add(item)
+
+    def _positions(self, item: Hashable) -> Iterator[int]:
+        h = _mix64(item)
+        # Double hashing: the k hashes are h1 + i * h2.
+        h1, h2 = h & 0xffffffff, (h >> 32) | 1
+        size = self.size
+        return ((h1 + i * h2) % size for i in range(self.hashes))
+
+    def add(self, item: Hashable):
+        bits = self.bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: Hashable) -> bool:
+        bits = self.bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        """The number of items that were added (duplicates included)."""
+        return self.count
+
+    def false_positive_rate(self) -> float:
+        """The expected false positive rate for the number of items that have been added."""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+    def stats(self) -> dict:
+        return {
+            'entries': self.count,
+            'bytes': sys.getsizeof(self.bits),
+            'hashes': self.hashes,
+            'error_rate': self.error_rate,
+            'false_positive_rate': self.false_positive_rate(),
+        }
+
+@include
+class CompactHashSet:
+    """A read-only set that only stores a 64-bit hash of each item.
+
+    Each item costs 8 bytes, which is a fraction of a `set`, and lookups are a
+    binary search. Two different items with the same hash are indistinguishable,
+    so there is a small chance of false positives, but never false negatives.
+
+    Building it hashes and sorts every item, which is done with NumPy if it's already
+    loaded (about as fast as building a `set`). Otherwise it's done in Python, which
+    takes a second or two per million items, though still without a `set` of them.
+    """
+    __slots__ = ('hashes',)
+
+    def __init__(self, items: Iterable[Hashable] = ()):
+        if is_loaded('numpy'):
+            self.hashes = _sorted_hashes(items)
+        else:
+            # `groupby` drops the duplicates from the sorted hashes in C.
+            hashes = itertools.groupby(sorted(map(_mix64, items)))
+            self.hashes = array.array('Q', map(operator.itemgetter(0), hashes))
+
+    def __contains__(self, item: Hashable) -> bool:
+        h = _mix64(item)
+        hashes = self.hashes
+        index = bisect.bisect_left(hashes, h)
+        return index < len(hashes) and hashes[index] == h
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def false_positive_rate(self) -> float:
+        """The chance that an item that wasn't added collides with one that was.
+        
+        This assumes hashes are spread evenly over 64 bits, which Python's
+        hash of numbers (modulo 2**61 - 1) is not, so numbers collide somewhat more often.
+        """
+        return len(self.hashes) / 2 ** 64
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self.hashes),
+            'bytes': sys.getsizeof(self.hashes),
+            'false_positive_rate': self.false_positive_rate(),
+        }
+
+_missing = object()
+
+@include
+class BoundedCache:
+    """A thread-safe mapping with a bounded size that evicts entries by a policy.
+
+    Policies:
+    - `'lru'`: Evicts the least recently used entry.
+    - `'lfu'`: Evicts the least frequently used entry (the least recently used of those on ties).
+    - `'ttl'`: Evicts the oldest entry, which is the one closest to expiring.
+
+    Entries expire `ttl` seconds after they were set if `ttl` is given, whatever the policy.
+    Besides `maxsize` entries, the cache can be held to `maxbytes`, where the size of
+    each value is measured by `sizeof` (by default `sys.getsizeof`, which does not
+    include the objects that a value refers to). A value larger than `maxbytes` is not stored.
+
+    `hits`, `misses`, `evictions` and `expirations` count what happened to lookups and entries.
+    """
+    __slots__ = (
+        'policy', 'maxsize', 'ttl', 'maxbytes', 'sizeof',
+        'hits', 'misses', 'evictions', 'expirations', 'bytes',
+        '_entries', '_buckets', '_minfreq', '_lock',
+    )
+
+    def __init__(
+            self,
+            policy: Literal['lru', 'lfu', 'ttl'] = 'lru',
+            maxsize: int | None = 128,
+            ttl: float | None = None,
+            maxbytes: int | None = None,
+            sizeof: Callable[[Any], int] = sys.getsizeof,
+        ):
+        if policy not in ('lru', 'lfu', 'ttl'):
+            raise ValueError(f'Invalid policy: {policy!r}')
+        if policy == 'ttl' and ttl is None:
+            raise ValueError("The 'ttl' policy needs a ttl.")
+        self.policy = policy
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.hits = self.misses = self.evictions = self.expirations = self.bytes = 0
+        # key -> [value, size, expiry, frequency], in eviction order for lru and ttl.
+        self._entries = OrderedDict()
+        # For lfu: frequency -> keys with that frequency, least recently used first.
+        self._buckets = defaultdict(OrderedDict)
+        self._minfreq = 0
+        self._lock = threading.RLock()
+
+    def _unlink(self, key) -> list:
+        entry = self._entries.pop(key)
+        self.bytes -= entry[1]
+        if self.policy == 'lfu':
+            bucket = self._buckets[entry[3]]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[entry[3]]
+        return entry
+
+    def _evict(self):
+        if self.policy == 'lfu':
+            if self._minfreq not in self._buckets:
+                self._minfreq = min(self._buckets)
+            key = next(iter(self._buckets[self._minfreq]))
+        else:
+            key = next(iter(self._entries))
+        self._unlink(key)
+        self.evictions += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                self._unlink(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            match self.policy:
+                case 'lru':
+                    self._entries.move_to_end(key)
+                case 'lfu':
+                    freq = entry[3]
+                    bucket = self._buckets[freq]
+                    del bucket[key]
+                    if not bucket:
+                        del self._buckets[freq]
+                        if self._minfreq == freq:
+                            self._minfreq = freq + 1
+                    entry[3] = freq + 1
+                    self._buckets[freq + 1][key] = None
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any):
+        size = self.sizeof(value) if self.maxbytes is not None else 0
+        with self._lock:
+            if key in self._entries:
+                self._unlink(key)
+            if self.maxbytes is not None and size > self.maxbytes:
+                return
+            while self._entries and (
+                (self.maxsize is not None and len(self._entries) >= self.maxsize)
+                or (self.maxbytes is not None and self.bytes + size > self.maxbytes)
+            ):
+                self._evict()
+            if self.maxsize is not None and self.maxsize <= 0:
+                return
+            expiry = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[key] = [value, size, expiry, 1]
+            self.bytes += size
+            if self.policy == 'lfu':
+                self._buckets[1][key] = None
+                self._minfreq = 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._unlink(key)[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self.bytes = 0
+
+    def __getitem__(self, key: Hashable) -> Any:
+        if (value := self.get(key, _missing)) is _missing:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self.set(key, value)
+
+    def __delitem__(self, key: Hashable):
+        if self.pop(key, _missing) is _missing:
+            raise KeyError(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'policy': self.policy,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'bytes': self.bytes if self.maxbytes is not None else None,
+            'maxbytes': self.maxbytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+    def __repr__(self) -> str:
+        return f'<BoundedCache {self.policy} size={len(self._entries)} hits={self.hits} misses={self.misses}>'
@@ -2,7 +2,14 @@ from typing import *
 from functools import wraps
 import inspect
 from inspect import Parameter as param
+import sys
+import os
+import time
+import threading
+import weakref
+from types import ModuleType
 from .fp import first
+from .container import BoundedCache
 from .modutil import Includer
 
 __all__ = (include := Includer())
@@ -10,7 +17,7 @@ __all__ = (include := Includer())
 # TODO: Update the decorator to add a `.replace(value)` function to
 #       the wrapper allowing the decorator to replace the decorated value.
 @include
-def decorator(target):
+def decorator(target = None, *, bare: bool = False):
     """Turns `target` into a decorator.
     
     `target` must be a callable that has a signature such as:
@@ -33,11 +40,31 @@ def decorator(target):
     ```
     or
     ```
+    @example_decorator
+    def example_function():
+        ...
+    ```
+    If `target` returns a `hooks` instead of a wrapper, the wrapper is generated by
+    `wrap`, with the same parameters as the decorated function, and stacked `hooks`
+    decorators are collapsed into a single function.
+
+    A decorator that takes arguments normally has to be used with parentheses. With
+    `@decorator(bare=True)`, it can also be used without them, as long as all of its
+    arguments are optional: when it's called with a single callable as its only
+    argument, that is taken to be the decorated target. Only use this when the first
+    argument can't be a callable itself.
+    ```
+    @decorator(bare=True)
+    def example_decorator(target, size: int = 1):
+        ...
+
     @example_decorator
     def example_function():
         ...
     ```
     """
+    if target is None:
+        return lambda target: decorator(target, bare=bare)
     if not callable(target):
         raise TypeError(type(target))
     sig = inspect.signature(target)
@@ -49,6 +76,8 @@ def decorator(target):
             # Call the target function, and if a result is returned, that is the replacement.
             # If None is returned, no replacement occurs.
             if (result := target(decorator_target)) is not None:
+                if isinstance(result, hooks):
+                    return wrap(decorator_target, result)
                 return result
             else:
                 return decorator_target
@@ -56,16 +85,213 @@ def decorator(target):
     else:
         @wraps(target)
         def _wrapped(*args, **kwargs):
+            if bare and len(args) == 1 and not kwargs and callable(args[0]):
+                # Used without parentheses.
+                return _wrapped()(args[0])
             def inner(decorator_target):
                 # Call the target function, and if a result is returned, that is the replacement.
                 # If None is returned, no replacement occurs.
                 if (result := target(decorator_target, *args, **kwargs)) is not None:
+                    if isinstance(result, hooks):
+                        return wrap(decorator_target, result)
                     return result
                 else:
                     return decorator_target
             return inner
         return _wrapped
 
+@include
+class hooks:
+    """Describes a wrapper for `wrap` (or `decorator`) to generate.
+
+    - `guard`: If it returns a false value, the target isn't called and the wrapper returns `default`.
+    - `before`: Called before the target.
+    - `after`: Given the target's result, and returns the wrapper's result.
+
+    `guard` and `before` are given the wrapper's arguments, unless `passargs` is False.
+    ```py
+    @decorator
+    def logged(target, log):
+        return hooks(before=lambda *args, **kwargs: log(target.__name__, args, kwargs))
+    ```
+    """
+    __slots__ = ('guard', 'before', 'after', 'default', 'passargs')
+    def __init__(
+            self,
+            guard: Callable[..., Any] = None,
+            before: Callable[..., Any] = None,
+            after: Callable[[Any], Any] = None,
+            default: Any = None,
+            passargs: bool = True,
+        ):
+        self.guard = guard
+        self.before = before
+        self.after = after
+        self.default = default
+        self.passargs = passargs
+
+# The default of a generated wrapper's parameters, so that it can tell which arguments were passed.
+_omitted = object()
+
+def _hookargs(names: Tuple[str, ...], values: tuple, star: tuple, keywords: dict, extra: dict) -> Tuple[tuple, dict]:
+    """The arguments that were passed to a generated wrapper, without the omitted ones.
+
+    `names` and `values` are the positional parameters, `star` is the `*args`,
+    `keywords` the keyword-only parameters and `extra` the `**kwargs`.
+    """
+    args = values
+    kwargs = {}
+    for index, value in enumerate(values):
+        if value is _omitted:
+            args = values[:index]
+            # The positional parameters after an omitted one can only have been passed by name.
+            for name, later in zip(names[index + 1:], values[index + 1:]):
+                if later is not _omitted:
+                    kwargs[name] = later
+            break
+    else:
+        args += star
+    for name, value in keywords.items():
+        if value is not _omitted:
+            kwargs[name] = value
+    kwargs.update(extra)
+    return args, kwargs
+
+def _signature_source(sig: inspect.Signature, const: Callable[[Any], str], defaults: str = None) -> Tuple[str, str]:
+    """The parameter list for `sig`, and the arguments that forward those parameters.
+
+    If `defaults` is given, it's the default of every parameter that has one.
+    """
+    parameters = []
+    arguments = []
+    star = False
+    kinds = [p.kind for p in sig.parameters.values()]
+    for index, p in enumerate(sig.parameters.values()):
+        if p.default is param.empty:
+            default = ''
+        else:
+            default = f'={defaults or const(p.default)}'
+        match p.kind:
+            case param.POSITIONAL_ONLY:
+                parameters.append(f'{p.name}{default}')
+                arguments.append(p.name)
+                if param.POSITIONAL_ONLY not in kinds[index + 1:]:
+                    parameters.append('/')
+            case param.POSITIONAL_OR_KEYWORD:
+                parameters.append(f'{p.name}{default}')
+                arguments.append(p.name)
+            case param.VAR_POSITIONAL:
+                star = True
+                parameters.append(f'*{p.name}')
+                arguments.append(f'*{p.name}')
+            case param.KEYWORD_ONLY:
+                if not star:
+                    star = True
+                    parameters.append('*')
+                parameters.append(f'{p.name}{default}')
+                arguments.append(f'{p.name}={p.name}')
+            case param.VAR_KEYWORD:
+                parameters.append(f'**{p.name}')
+                arguments.append(f'**{p.name}')
+    return ', '.join(parameters), ', '.join(arguments)
+
+@include
+def wrap(target: Callable, *layers: hooks) -> Callable:
+    """Generates a wrapper for `target` that runs the `hooks` in `layers`, outermost first.
+
+    The wrapper has the same parameters as `target`, so arguments are passed straight
+    through instead of being packed into `*args, **kwargs` and unpacked again. If
+    `target` is itself a wrapper made by `wrap`, its hooks are merged in, so a stack
+    of decorators is collapsed into one function that behaves like the stack did.
+    The hooks are given the arguments the way the caller passed them, like they would
+    be by a `*args, **kwargs` wrapper, except that the positional parameters after one
+    that was left out are passed by name.
+    When `target` has no signature (like some builtins), the wrapper takes `*args, **kwargs`.
+    """
+    extra = {}
+    if (chain := getattr(target, '__hooks__', None)) is not None and chain[0] is target:
+        # Keep the attributes that were set on the wrapper being replaced.
+        extra = {k: v for k, v in target.__dict__.items() if k not in ('__hooks__', '__wrapped__')}
+        target, layers = chain[1], (*layers, *chain[2])
+    try:
+        sig = inspect.signature(target, follow_wrapped=False)
+    except (TypeError, ValueError):
+        sig = inspect.Signature([param('args', param.VAR_POSITIONAL), param('kwargs', param.VAR_KEYWORD)])
+    names = set(sig.parameters)
+    prefix = '_w'
+    while any(name.startswith(prefix) for name in names):
+        prefix += '_'
+    constants = []
+    def const(value) -> str:
+        constants.append(value)
+        return f'{prefix}{len(constants) - 1}'
+    defaulted = [p for p in sig.parameters.values() if p.default is not param.empty]
+    passargs = any(layer.passargs and (layer.guard is not None or layer.before is not None) for layer in layers)
+    setup = []
+    if defaulted and passargs:
+        # The parameters default to `_omitted`, so that the hooks only get what was passed,
+        # and the real defaults are filled in before the target is called.
+        omitted = const(_omitted)
+        parameters, arguments = _signature_source(sig, const, omitted)
+        kinds = {}
+        for p in sig.parameters.values():
+            kinds.setdefault(p.kind, []).append(p)
+        positional = [p.name for p in (*kinds.get(param.POSITIONAL_ONLY, ()), *kinds.get(param.POSITIONAL_OR_KEYWORD, ()))]
+        star = kinds[param.VAR_POSITIONAL][0].name if param.VAR_POSITIONAL in kinds else None
+        varkw = kinds[param.VAR_KEYWORD][0].name if param.VAR_KEYWORD in kinds else None
+        setup.append(
+            f'{prefix}a, {prefix}k = {const(_hookargs)}({const(tuple(positional))}, '
+            f'({"".join(f"{name}, " for name in positional)}), {star or "()"}, '
+            f'{{{", ".join(f"{p.name!r}: {p.name}" for p in kinds.get(param.KEYWORD_ONLY, ()))}}}, {varkw or "{}"})'
+        )
+        for p in defaulted:
+            setup.append(f'if {p.name} is {omitted}: {p.name} = {const(p.default)}')
+        hookargs = f'*{prefix}a, **{prefix}k'
+    else:
+        parameters, arguments = _signature_source(sig, const)
+        hookargs = arguments
+    is_async = inspect.iscoroutinefunction(target)
+    call = f'{"await " if is_async else ""}{const(target)}({arguments})'
+    result = f'{prefix}r'
+    # Built from the innermost layer out, so that a failed guard skips the layers inside it.
+    body = [f'{result} = {call}']
+    for layer in reversed(layers):
+        args = hookargs if layer.passargs else ''
+        lines = []
+        if layer.before is not None:
+            lines.append(f'{const(layer.before)}({args})')
+        lines += body
+        if layer.guard is not None:
+            lines = [
+                f'if {const(layer.guard)}({args}):',
+                *('    ' + line for line in lines),
+                'else:',
+                f'    {result} = {const(layer.default)}',
+            ]
+        if layer.after is not None:
+            lines.append(f'{result} = {const(layer.after)}({result})')
+        body = lines
+    body = setup + body
+    name = target.__name__ if getattr(target, '__name__', '').isidentifier() else 'wrapper'
+    names = ', '.join(f'{prefix}{i}' for i in range(len(constants)))
+    source = (
+        f'def {prefix}factory({names}):\n'
+        f'    {"async " if is_async else ""}def {name}({parameters}):\n'
+        + ''.join(f'        {line}\n' for line in body) +
+        f'        return {result}\n'
+        f'    return {name}\n'
+    )
+    namespace = {}
+    exec(compile(source, f'<wrap {name}>', 'exec'), namespace)
+    wrapper = namespace[f'{prefix}factory'](*constants)
+    try:
+        wraps(target)(wrapper)
+    except AttributeError:
+        pass
+    wrapper.__dict__.update(extra)
+    wrapper.__hooks__ = (wrapper, target, layers)
+    return wrapper
+
 @include
 class params:
     __slots__ = ('args', 'kwargs')
@@ -79,7 +305,18 @@ class params:
         self.args = args
         self.kwargs = kwargs
     def invoke(self, fn: Callable):
-        return fn(*self.args, **self.kwargs)
+        if self.kwargs:
+            return fn(*self.args, **self.kwargs)
+        return fn(*self.args)
+    def __eq__(self, other):
+        if isinstance(other, params):
+            return self.args == other.args and self.kwargs == other.kwargs
+        return NotImplemented
+    def __hash__(self):
+        return hash((self.args, frozenset(self.kwargs.items())))
+    def __repr__(self):
+        parts = [*map(repr, self.args), *(f'{k}={v!r}' for k, v in self.kwargs.items())]
+        return f'params({", ".join(parts)})'
 
 @include
 class Alias:
@@ -98,7 +335,7 @@ class Alias:
             case (alt, (), {}) if isinstance(alt, params):
                 self.args = alt.args
                 self.kwargs = alt.kwargs
-            case (Ellipsis, _, _):
+            case _ if _params is ...:
                 self.args = args
                 self.kwargs = kwargs
             case (something, args, kwargs):
@@ -109,7 +346,14 @@ class Alias:
     @overload
     def __call__(self, *args, **kwargs):...
     def __call__(self, *args, **kwargs):
-        return self.target(*(*self.args, *args), **{**self.kwargs, **kwargs})
+        # Only build a merged dict when both sides have keyword arguments.
+        if kwargs:
+            if self.kwargs:
+                return self.target(*self.args, *args, **{**self.kwargs, **kwargs})
+            return self.target(*self.args, *args, **kwargs)
+        if self.kwargs:
+            return self.target(*self.args, *args, **self.kwargs)
+        return self.target(*self.args, *args)
 
 @decorator
 @include
@@ -171,6 +415,487 @@ def singleton(cls):
     """When used as a decorator for a class, turns class into a singleton."""
     setattr(cls, '__new__', __new__singleton__)
 
+_missing = object()
+_kwd_mark = object()
+
+def _argskey(args: tuple, kwargs: dict) -> Hashable:
+    """The default cache key: the arguments themselves, which must be hashable."""
+    if kwargs:
+        return (args, _kwd_mark, frozenset(kwargs.items()))
+    return args
+
+@decorator(bare=True)
+@include
+def memoize(
+        target,
+        policy: Literal['lru', 'lfu', 'ttl'] = 'lru',
+        maxsize: int | None = 128,
+        ttl: float | None = None,
+        maxbytes: int | None = None,
+        key: Callable[[params], Hashable] = None,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+    ):
+    """Caches the results of the decorated function in a `container.BoundedCache`.
+
+    `policy`, `maxsize`, `ttl`, `maxbytes` and `sizeof` are passed along to the cache.
+    By default, the cache key is made from the arguments, which must be hashable.
+    `key` can be used to make a custom key; it is given the arguments as a `params`
+    bundle (which is hashable itself if its arguments are).
+
+    The decorated function gets a few extra attributes:
+    - `cache`: The `BoundedCache`.
+    - `stats()`: Hit, miss and eviction counters.
+    - `invalidate(*args, **kwargs)`: Forgets the result for those arguments.
+    - `clear()`: Forgets all results.
+
+    The cache is thread-safe, but like `functools.lru_cache`, two threads that miss on
+    the same key at the same time will both call the function. `@memoize` can be used
+    without parentheses for the defaults.
+    ```py
+    @memoize('lfu', maxsize=1024, key=lambda p: p.args[0].lower())
+    def fetch_user(name: str, session = None):...
+    ```
+    """
+    cache = BoundedCache(policy, maxsize, ttl, maxbytes, sizeof)
+    if key is None:
+        makekey = _argskey
+    else:
+        def makekey(args, kwargs):
+            return key(params(*args, **kwargs))
+    @wraps(target)
+    def memoized(*args, **kwargs):
+        k = makekey(args, kwargs)
+        if (result := cache.get(k, _missing)) is not _missing:
+            return result
+        result = target(*args, **kwargs)
+        cache.set(k, result)
+        return result
+    def invalidate(*args, **kwargs):
+        cache.pop(makekey(args, kwargs))
+    memoized.cache = cache
+    memoized.stats = cache.stats
+    memoized.invalidate = invalidate
+    memoized.clear = cache.clear
+    return memoized
+
+@include
+class Pool:
+    """The instances of a `pooled` class, keyed by their constructor arguments.
+
+    `created` and `reused` count constructions and calls that returned an existing
+    instance. `reused` is updated without a lock, so it can undercount under contention.
+    """
+    __slots__ = ('cls', 'key', 'weak', 'created', 'reused', '_instances', '_strong', '_locks', '_lock')
+
+    def __init__(self, cls: type, key: Callable[[tuple, dict], Hashable], maxsize: int | None, weak: bool):
+        self.cls = cls
+        self.key = key
+        self.weak = weak
+        self.created = self.reused = 0
+        if weak:
+            if not cls.__weakrefoffset__:
+                raise TypeError(f'{cls.__name__} instances do not support weak references.')
+            self._instances = weakref.WeakValueDictionary()
+            # Keeps the most recently used instances alive.
+            self._strong = BoundedCache('lru', maxsize) if maxsize else None
+        else:
+            self._instances = BoundedCache('lru', maxsize)
+            self._strong = None
+        # key -> the lock held while that key's instance is being created.
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        instance = self._instances.get(key)
+        if instance is not None and self._strong is not None:
+            self._strong.set(key, instance)
+        return instance
+
+    def create(self, key: Hashable, construct: Callable[[], Any]) -> Any:
+        """Returns the instance for `key`, calling `construct` if there isn't one.
+
+        Only one thread constructs the instance for a key, while instances for other
+        keys can be constructed at the same time.
+        """
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        try:
+            with lock:
+                if (instance := self.get(key)) is not None:
+                    self.reused += 1
+                    return instance
+                instance = construct()
+                if self.weak:
+                    self._instances[key] = instance
+                    if self._strong is not None:
+                        self._strong.set(key, instance)
+                else:
+                    self._instances.set(key, instance)
+                self.created += 1
+                return instance
+        finally:
+            with self._lock:
+                if self._locks.get(key) is lock:
+                    del self._locks[key]
+
+    def discard(self, *args, **kwargs):
+        """Removes the instance made from these arguments."""
+        key = self.key(args, kwargs)
+        try:
+            hash(key)
+        except TypeError:
+            # Instances made from these arguments were never pooled.
+            return
+        if self.weak:
+            self._instances.pop(key, None)
+            if self._strong is not None:
+                self._strong.pop(key)
+        else:
+            self._instances.pop(key)
+
+    def clear(self):
+        self._instances.clear()
+        if self._strong is not None:
+            self._strong.clear()
+
+    def __len__(self) -> int:
+        return len(self._instances)
+
+    def stats(self) -> dict:
+        stats = {'size': len(self), 'created': self.created, 'reused': self.reused}
+        cache = self._strong if self.weak else self._instances
+        if cache is not None:
+            stats['evictions'] = cache.evictions
+        return stats
+
+    def __repr__(self) -> str:
+        return f'Pool({self.cls.__name__}, size={len(self)})'
+
+@decorator(bare=True)
+@include
+def pooled(
+        cls,
+        maxsize: int | None = None,
+        weak: bool = False,
+        key: Callable[[params], Hashable] = None,
+    ):
+    """Makes a class return the same instance for the same constructor arguments.
+
+    Instances are kept in a `Pool`, keyed by the arguments, or by what `key` returns
+    when it's given the arguments as a `params` bundle. The arguments are bound to the
+    signature of `__init__` with the defaults filled in first, so `Connection('db')` and
+    `Connection(host='db', port=5432)` are the same. If the key can't be hashed (like
+    when an argument or a default is a list), a new instance is made without pooling it. With
+    `maxsize`, the least recently used instance is dropped when the pool is full. With
+    `weak=True`, instances are only held weakly, so an instance is dropped once nothing
+    else uses it, and `maxsize` is how many recently used instances are kept alive anyway.
+
+    `__init__` only runs when an instance is created, never on reuse. Creation is
+    thread-safe: a lookup only holds the pool's cache lock for the lookup itself, and
+    only one thread constructs the instance for a key, while other keys can be
+    constructed at the same time. The pool is available as `cls.pool`. Subclasses of
+    the decorated class are not pooled. `@pooled` can be used without parentheses.
+    ```py
+    @pooled(maxsize=16)
+    class Connection:
+        def __init__(self, host: str, port: int = 5432):...
+
+    assert Connection('db', 5432) is Connection('db', 5432)
+    print(Connection.pool.stats())
+    ```
+    """
+    if not isinstance(cls, type):
+        raise TypeError(f'pooled can only decorate a class: {cls!r}')
+    original_new = cls.__new__
+    original_init = cls.__init__
+    try:
+        signature = inspect.signature(original_init)
+    except (TypeError, ValueError):
+        signature = None
+
+    def normalize(args: tuple, kwargs: dict) -> Tuple[tuple, dict]:
+        if signature is None:
+            return args, kwargs
+        try:
+            bound = signature.bind(None, *args, **kwargs)
+        except TypeError:
+            # Constructing the instance will raise the error.
+            return args, kwargs
+        bound.apply_defaults()
+        return bound.args[1:], bound.kwargs
+
+    if key is None:
+        def makekey(args, kwargs):
+            return _argskey(*normalize(args, kwargs))
+    else:
+        def makekey(args, kwargs):
+            args, kwargs = normalize(args, kwargs)
+            return key(params(*args, **kwargs))
+    pool = Pool(cls, makekey, maxsize, weak)
+
+    def construct(klass, args, kwargs):
+        if original_new is object.__new__:
+            instance = original_new(klass)
+        else:
+            instance = original_new(klass, *args, **kwargs)
+        original_init(instance, *args, **kwargs)
+        return instance
+
+    @wraps(original_new)
+    def __new__(klass, *args, **kwargs):
+        if klass is not cls:
+            if original_new is object.__new__:
+                return original_new(klass)
+            return original_new(klass, *args, **kwargs)
+        k = makekey(args, kwargs)
+        try:
+            hash(k)
+        except TypeError:
+            # Like a mutable default argument, so this instance can't be pooled.
+            return construct(klass, args, kwargs)
+        if (instance := pool.get(k)) is not None:
+            pool.reused += 1
+            return instance
+        return pool.create(k, lambda: construct(klass, args, kwargs))
+
+    @wraps(original_init)
+    def __init__(self, *args, **kwargs):
+        # Instances of `cls` were initialized by `__new__`.
+        if type(self) is not cls:
+            original_init(self, *args, **kwargs)
+
+    cls.__new__ = __new__
+    cls.__init__ = __init__
+    cls.pool = pool
+    return cls
+
+multiton = pooled
+include.include('multiton')
+
+_diskcache_schema = """
+CREATE TABLE IF NOT EXISTS entries (
+    function TEXT NOT NULL,
+    codehash TEXT NOT NULL,
+    key BLOB NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (function, key)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (function, accessed);
+"""
+
+# sqlite3 connections can't be shared between threads, and must not be used by a child
+# process after a fork, so each thread of each process gets its own.
+_diskcache_local = threading.local()
+
+def _diskcache_connection(path: str) -> 'sqlite3.Connection':
+    import sqlite3
+    connections = getattr(_diskcache_local, 'connections', None)
+    if connections is None or _diskcache_local.pid != os.getpid():
+        connections = _diskcache_local.connections = {}
+        _diskcache_local.pid = os.getpid()
+    if (connection := connections.get(path)) is None:
+        # Autocommit mode, so that writes can take the lock up front with BEGIN IMMEDIATE.
+        connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.executescript(_diskcache_schema)
+        connections[path] = connection
+    return connection
+
+def _diskcache_path() -> str:
+    """The default cache file, in a directory that only the current user can use."""
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    directory = os.path.join(base, 'toolbox')
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return os.path.join(directory, 'diskcache.sqlite3')
+
+def _diskcache_check(path: str):
+    """Refuses a cache that another user owns or can write to, since its pickles would run as us."""
+    if not hasattr(os, 'getuid'):
+        return
+    for target in (os.path.dirname(os.path.abspath(path)), path):
+        try:
+            st = os.stat(target)
+        except FileNotFoundError:
+            continue
+        if target != path and st.st_mode & 0o1000:
+            # A sticky directory like /tmp is shared, but other users can't replace our file in it.
+            continue
+        if st.st_uid != os.getuid() or st.st_mode & 0o022:
+            raise PermissionError(f'Refusing to use a cache that other users can write to: {target}')
+
+# Tags for the values that `_diskcache_normalize` turns into sorted tuples.
+_diskcache_set = 'toolbox.diskcache:set'
+_diskcache_frozenset = 'toolbox.diskcache:frozenset'
+_diskcache_dict = 'toolbox.diskcache:dict'
+
+def _diskcache_normalize(value):
+    """Puts sets and dicts (within lists and tuples) in a stable order before they're pickled.
+
+    The order of a set depends on the hashes of its items, and strings hash differently
+    in each process, so the same set can pickle differently from one run to the next.
+    """
+    import pickle
+    def order(item) -> bytes:
+        return pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+    match value:
+        case set() | frozenset():
+            tag = _diskcache_set if isinstance(value, set) else _diskcache_frozenset
+            return (tag, *sorted(map(_diskcache_normalize, value), key=order))
+        case dict():
+            items = ((_diskcache_normalize(k), _diskcache_normalize(v)) for k, v in value.items())
+            return (_diskcache_dict, *sorted(items, key=order))
+        case list():
+            return list(map(_diskcache_normalize, value))
+        case tuple() if type(value) is tuple:
+            return tuple(map(_diskcache_normalize, value))
+    return value
+
+def _codehash(target: Callable) -> str:
+    """Hashes the source of `target`, or its code object if the source isn't available.
+
+    Without either (like for a builtin), its qualified name is used, since its `repr`
+    may hold an address that changes from one process to the next.
+    """
+    import hashlib
+    try:
+        code = inspect.getsource(target).encode()
+    except (OSError, TypeError):
+        import marshal
+        if (code := getattr(target, '__code__', None)) is not None:
+            code = marshal.dumps(code)
+        else:
+            qualname = getattr(target, '__qualname__', None) or type(target).__qualname__
+            code = f'{getattr(target, "__module__", None)}.{qualname}'.encode()
+    return hashlib.sha256(code).hexdigest()
+
+@decorator(bare=True)
+@include
+def diskcache(
+        target,
+        path: str | os.PathLike = None,
+        maxbytes: int | None = 256 * 2**20,
+        maxentries: int | None = None,
+        key: Callable[[params], Any] = None,
+    ):
+    """Caches the pickled results of the decorated function in an SQLite database.
+
+    The cache survives between runs and is shared by every process that uses the same
+    `path` (by default `toolbox/diskcache.sqlite3` in the user's cache directory, which is
+    created so that only they can use it). Since the results are unpickled, a cache file
+    or directory that belongs to another user, or that other users can write to, is refused
+    with a `PermissionError`.
+
+    Entries are keyed by the function's qualified name and a hash of its pickled arguments
+    (or of what `key` returns for the arguments as a `params` bundle). Sets and dicts
+    directly in the arguments (or in lists and tuples in them) are put in a stable order
+    first, but ones inside other objects aren't, so those may miss the cache in another
+    process. If the arguments can't be pickled, the function is called without the cache.
+    Entries are also tagged with a hash of the function's source, so when the source
+    changes, the old entries are dropped.
+
+    Each function keeps at most `maxbytes` of pickled results and `maxentries` entries,
+    and the least recently used entries are evicted to stay under them. Results that can't
+    be pickled are returned without being cached.
+
+    The decorated function gets `clear()` and `invalidate(*args, **kwargs)` attributes.
+    ```py
+    @diskcache(maxbytes=2**30)
+    def expensive(path: str, level: int = 3):...
+    ```
+    """
+    # Imported here, since they slow down importing this module and only the cache needs them.
+    import hashlib
+    import pickle
+    path = os.fspath(path) if path is not None else _diskcache_path()
+    name = f'{target.__module__}.{target.__qualname__}'
+    codehash = _codehash(target)
+    checked = set()
+
+    def connect() -> 'sqlite3.Connection':
+        # Check the file, and drop the entries made by other versions of the function, once per process.
+        if os.getpid() not in checked:
+            _diskcache_check(path)
+        connection = _diskcache_connection(path)
+        if os.getpid() not in checked:
+            connection.execute('DELETE FROM entries WHERE function = ? AND codehash != ?', (name, codehash))
+            checked.add(os.getpid())
+        return connection
+
+    def makekey(args, kwargs) -> bytes:
+        value = key(params(*args, **kwargs)) if key is not None else (args, sorted(kwargs.items()))
+        return hashlib.sha256(pickle.dumps(_diskcache_normalize(value), pickle.HIGHEST_PROTOCOL)).digest()
+
+    def store(connection: 'sqlite3.Connection', k: bytes, data: bytes):
+        if maxbytes is not None and len(data) > maxbytes:
+            return
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                (name, codehash, k, data, len(data), time.time()),
+            )
+            count, total = connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE function = ?', (name,)
+            ).fetchone()
+            if (maxentries is not None and count > maxentries) or (maxbytes is not None and total > maxbytes):
+                evict = []
+                for rowid, size in connection.execute(
+                    'SELECT rowid, size FROM entries WHERE function = ? ORDER BY accessed', (name,)
+                ):
+                    if (maxentries is None or count <= maxentries) and (maxbytes is None or total <= maxbytes):
+                        break
+                    evict.append((rowid,))
+                    count -= 1
+                    total -= size
+                connection.executemany('DELETE FROM entries WHERE rowid = ?', evict)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    @wraps(target)
+    def cached(*args, **kwargs):
+        try:
+            k = makekey(args, kwargs)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return target(*args, **kwargs)
+        connection = connect()
+        row = connection.execute(
+            'SELECT value FROM entries WHERE function = ? AND key = ? AND codehash = ?', (name, k, codehash)
+        ).fetchone()
+        if row is not None:
+            connection.execute('UPDATE entries SET accessed = ? WHERE function = ? AND key = ?', (time.time(), name, k))
+            return pickle.loads(row[0])
+        result = target(*args, **kwargs)
+        try:
+            data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return result
+        store(connection, k, data)
+        return result
+
+    def invalidate(*args, **kwargs):
+        try:
+            k = makekey(args, kwargs)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # Calls with these arguments were never cached.
+            return
+        connect().execute('DELETE FROM entries WHERE function = ? AND key = ?', (name, k))
+
+    def clear():
+        connect().execute('DELETE FROM entries WHERE function = ?', (name,))
+
+    cached.invalidate = invalidate
+    cached.clear = clear
+    cached.path = path
+    return cached
+
 R = TypeVar("R")
 
 @include
@@ -191,6 +916,107 @@ def evaluate(target: Callable[[], R]) -> R:
     """
     return target()
 
+class _Lazy:
+    """The value of a `lazy_evaluate` function, computed on first access."""
+    __slots__ = ('target', 'name', 'owner', 'value', 'seconds', 'lock', '__weakref__')
+
+    def __init__(self, target: Callable[[], Any]):
+        self.target = target
+        self.name = target.__name__
+        self.owner = None
+        self.value = _missing
+        self.seconds = None
+        self.lock = threading.Lock()
+
+    def get(self) -> Any:
+        if (value := self.value) is not _missing:
+            return value
+        with self.lock:
+            if self.value is _missing:
+                start = time.perf_counter()
+                value = self.target()
+                self.seconds = time.perf_counter() - start
+                self.value = value
+                self.publish()
+        return self.value
+
+    def publish(self):
+        """Replaces this placeholder with the value wherever it was bound."""
+        match self.owner:
+            case None:
+                pass
+            case type() as cls:
+                setattr(cls, self.name, self.value)
+            case module:
+                module.__dict__[self.name] = self.value
+                cls = type(module)
+                if self.name in cls.__dict__:
+                    delattr(cls, self.name)
+
+    # Used as a class attribute.
+    def __set_name__(self, owner: type, name: str):
+        self.owner = owner
+        self.name = name
+
+    def __get__(self, instance, owner = None):
+        return self.get()
+
+    def __repr__(self) -> str:
+        state = 'unevaluated' if self.value is _missing else f'{self.seconds:.6f}s'
+        return f'<lazy {self.target.__qualname__} ({state})>'
+
+class _LazyModule(ModuleType):
+    """Base of the per-module classes that hold the properties for lazy globals."""
+
+_lazy_values: List[_Lazy] = []
+_lazy_lock = threading.Lock()
+
+def _lazy_module(module: ModuleType) -> type:
+    """Gives `module` a class of its own that properties can be added to."""
+    cls = type(module)
+    if cls.__dict__.get('_lazy_owner') is module:
+        return cls
+    bases = (_LazyModule, cls) if cls is not ModuleType else (_LazyModule,)
+    cls = type('LazyModule', bases, {'__module__': module.__name__})
+    cls._lazy_owner = module
+    module.__class__ = cls
+    return cls
+
+@include
+def lazy_evaluate(target: Callable[[], R]) -> R:
+    """Like `evaluate`, but the function isn't called until the value is first used.
+
+    This works for module globals and class attributes. The value is computed once,
+    even when several threads access it for the first time at once, and then it
+    replaces the placeholder, so later accesses cost nothing extra.
+
+    Module globals are resolved when they're accessed as attributes of the module (as in
+    `module.name` or `from module import name`). Inside the module itself, the name
+    refers to the placeholder until the value has been computed, so use `name.get()` there.
+
+    `lazy_timings()` reports how long each value took.
+    ```
+    @lazy_evaluate
+    def table()->dict[str, int]:
+        return build_expensive_table()
+    ```
+    """
+    lazy = _Lazy(target)
+    with _lazy_lock:
+        _lazy_values.append(lazy)
+        # Defined at the top level of a module that is being imported.
+        if '.' not in target.__qualname__ and (module := sys.modules.get(target.__module__)) is not None:
+            lazy.owner = module
+            setattr(_lazy_module(module), lazy.name, property(lambda _: lazy.get()))
+    return lazy
+
+@include
+def lazy_timings() -> dict[str, float | None]:
+    """The seconds that each `lazy_evaluate` value took to compute (or None if it hasn't been)."""
+    with _lazy_lock:
+        values = list(_lazy_values)
+    return {f'{lazy.target.__module__}.{lazy.target.__qualname__}': lazy.seconds for lazy in values}
+
 @include
 class lookup:
     """The lookup class can be used to create a getter and optional setter for key lookup.
@@ -229,25 +1055,124 @@ class lookup:
     
     print(items['a'])
     ```
+    When the getter is slow (a linear scan or a remote fetch), pass `cache=True` to hold
+    up to `maxsize` results for `ttl` seconds (or until evicted). With `negative`, misses
+    (the getter returning None) are remembered too, for `ttl` seconds if `negative` is
+    True, or for `negative` seconds. Errors raised by the getter are raised to the
+    caller, and nothing is cached for them. Setting an item writes through the
+    setter and updates the cache. `get_many` looks up many keys at once, and hands the
+    keys that aren't cached to `batch` (which returns a mapping of the keys it found)
+    in a single call, if it's given. If `batch` raises, the keys are looked up one by
+    one with the getter instead.
+    ```
+    table = lookup(fetch_user, cache=True, ttl=60, negative=5, batch=fetch_users)
+    ```
     """
-    __slots__ = ('getter','setter')
-    def __init__(self, getter: Callable, setter: Callable = ...):
+    __slots__ = ('getter','setter','batch','cache','misses')
+    def __init__(
+            self,
+            getter: Callable,
+            setter: Callable = ...,
+            *,
+            batch: Callable[[list], Mapping] = None,
+            cache: bool = False,
+            maxsize: int | None = 1024,
+            ttl: float | None = None,
+            negative: bool | float = False,
+        ):
         self.getter = getter
         self.setter = setter if callable(setter) else self._assign_setter
+        self.batch = batch
+        self.cache = BoundedCache('lru', maxsize, ttl) if cache else None
+        match negative:
+            case False:
+                self.misses = None
+            case True:
+                self.misses = BoundedCache('lru', maxsize, ttl)
+            case seconds:
+                self.misses = BoundedCache('lru', maxsize, seconds)
     
     def _assign_setter(self, setter: Callable):
         self.setter = setter
         return setter
     
+    def _cached(self, key):
+        """The cached value for `key`, None for a remembered miss, or `_missing`."""
+        if self.cache is not None and (value := self.cache.get(key, _missing)) is not _missing:
+            return value
+        if self.misses is not None and self.misses.get(key, _missing) is not _missing:
+            return None
+        return _missing
+    
+    def _store(self, key, value):
+        if value is None:
+            if self.misses is not None:
+                self.misses.set(key, True)
+        elif self.cache is not None:
+            self.cache.set(key, value)
+    
     def __getitem__(self, key):
-        try:
+        if self.cache is None and self.misses is None:
             return self.getter(key)
-        except:
-            return None
+        if (value := self._cached(key)) is not _missing:
+            return value
+        value = self.getter(key)
+        self._store(key, value)
+        return value
     
     def __setitem__(self, key, value):
-        if callable(self.setter):
-            self.setter(key, value)
+        if self.setter == self._assign_setter:
+            return
+        self.setter(key, value)
+        if self.misses is not None:
+            self.misses.pop(key)
+        if self.cache is not None:
+            self.cache.pop(key)
+        self._store(key, value)
+    
+    def get_many(self, keys: Iterable) -> dict:
+        """Looks up every key in `keys`, and returns a dict of each key to its value (or None)."""
+        keys = list(keys)
+        found = {}
+        wanted = []
+        for key in dict.fromkeys(keys):
+            if (value := self._cached(key)) is not _missing:
+                found[key] = value
+            else:
+                wanted.append(key)
+        if wanted and self.batch is not None:
+            try:
+                fetched = self.batch(wanted)
+            except Exception:
+                # A failed batch says nothing about the keys, so each is looked up on its own.
+                fetched = None
+        else:
+            fetched = None
+        if fetched is not None:
+            for key in wanted:
+                found[key] = value = fetched.get(key)
+                self._store(key, value)
+        else:
+            for key in wanted:
+                found[key] = value = self.getter(key)
+                self._store(key, value)
+        return {key: found[key] for key in keys}
+    
+    def invalidate(self, key = _missing):
+        """Forgets the cached value (or miss) for `key`, or everything if no key is given."""
+        for cache in (self.cache, self.misses):
+            if cache is None:
+                continue
+            if key is _missing:
+                cache.clear()
+            else:
+                cache.pop(key)
+    
+    def stats(self) -> dict:
+        return {
+            'cache': self.cache.stats() if self.cache is not None else None,
+            'misses': self.misses.stats() if self.misses is not None else None,
+        }
     
     def __call__(self, *args, **kwargs):
         return self.getter(*args, **kwargs)
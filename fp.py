@@ -1,13 +1,60 @@
 import operator
 from typing import *
 import builtins
-from functools import partial, wraps
-from .modutil import Includer
+import sys
+import os
+import array
+import itertools
+import collections
+import heapq
+import random
+import threading
+import time
+from functools import partial, wraps, update_wrapper
+from types import MethodType
+from .container import LazySeq, BloomFilter, CompactHashSet
+from .modutil import Includer, is_loaded
 
 __all__ = Includer()
 
+def _asbatch(seq):
+    """Returns `seq` as a one dimensional ndarray if it is an array, otherwise `None`.
+
+    `array.array` and `memoryview` objects are viewed through NumPy (when it is installed)
+    without copying. Anything else is only treated as an array if it is an ndarray, and since
+    an ndarray can't exist unless NumPy was imported, NumPy is never imported just to check
+    (including when it was only imported lazily with `modutil.lazy_import`).
+    """
+    if isinstance(seq, (array.array, memoryview)):
+        try:
+            import numpy
+            values = numpy.asarray(seq)
+        except (ImportError, TypeError, ValueError):
+            return None
+    elif (numpy := sys.modules.get('numpy')) is not None and is_loaded(numpy) and isinstance(seq, numpy.ndarray):
+        values = seq
+    else:
+        return None
+    return values if values.ndim == 1 else None
+
+def _batchmask(filter, values):
+    """Applies the batch version of `filter` to `values` if it has one, otherwise returns `None`."""
+    if (batch := getattr(filter, 'batch', None)) is None:
+        return None
+    import numpy
+    mask = numpy.asarray(batch(values))
+    if mask.dtype != bool or mask.shape != values.shape:
+        return None
+    return mask
+
 @__all__
 def first(seq: Iterable, filter=None) -> Any | None:
+    if (
+        callable(filter)
+        and (values := _asbatch(seq)) is not None
+        and (mask := _batchmask(filter, values)) is not None
+    ):
+        return seq[int(mask.argmax())] if mask.any() else None
     for value in seq:
         if not callable(filter) or filter(value):
             return value
@@ -15,6 +62,8 @@ def first(seq: Iterable, filter=None) -> Any | None:
 
 @__all__
 def nth(n: int, seq: Iterable) -> Any | None:
+    if isinstance(seq, LazySeq):
+        return seq.get(n)
     # Try the obvious first.
     try:
         return seq[n]
@@ -27,11 +76,14 @@ def nth(n: int, seq: Iterable) -> Any | None:
 
 @__all__
 def last(seq: Sequence) -> Any | None:
+    if isinstance(seq, LazySeq):
+        return seq.get(-1)
     try:
         return seq[-1]
     except IndexError:
         return None
     except TypeError:
+        result = None
         for result in seq: pass
         return result
 
@@ -72,35 +124,47 @@ def returnFalse(*args, **kwargs): return False
 @__all__
 def returnNone(*args, **kwargs): return None
 
+class _comparison(partial):
+    """A `partial` of a comparison operator that can also be applied to a whole array at once.
+
+    `batch` takes an ndarray (or anything NumPy can view as an array, such as `array.array`)
+    and returns a boolean mask.
+    """
+    __slots__ = ()
+
+    def batch(self, values):
+        import numpy
+        return self.func(self.args[0], numpy.asarray(values))
+
 @__all__
 def ne(value):
     """Creates a function that checks if value is not equal to parameter."""
-    return partial(operator.ne, value)
+    return _comparison(operator.ne, value)
 
 @__all__
 def eq(value):
     """Creates a function that checks if value is equal to parameter."""
-    return partial(operator.eq, value)
+    return _comparison(operator.eq, value)
 
 @__all__
 def lt(value):
     """Creates a function that checks if value is less than parameter."""
-    return partial(operator.lt, value)
+    return _comparison(operator.lt, value)
 
 @__all__
 def le(value):
     """Creates a function that checks if value is less than or equal to parameter."""
-    return partial(operator.le, value)
+    return _comparison(operator.le, value)
 
 @__all__
 def gt(value):
     """Creates a function that checks if value is greater than parameter."""
-    return partial(operator.gt, value)
+    return _comparison(operator.gt, value)
 
 @__all__
 def ge(value):
     """Creates a function that checks if value is greater than or equal to parameter."""
-    return partial(operator.ge, value)
+    return _comparison(operator.ge, value)
 
 @__all__
 def is_(value):
@@ -120,49 +184,170 @@ def not_none(value):
 def is_none(value):
     return value is None
 
+def _is_none_batch(values):
+    """Batch version of `is_none`. Only object arrays can contain `None`."""
+    import numpy
+    values = numpy.asarray(values)
+    if values.dtype != object:
+        return numpy.zeros(values.shape, dtype=bool)
+    return numpy.fromiter((value is None for value in values.flat), dtype=bool, count=values.size).reshape(values.shape)
+
+def _not_none_batch(values):
+    """Batch version of `not_none`."""
+    return ~_is_none_batch(values)
+
+is_none.batch = _is_none_batch
+not_none.batch = _not_none_batch
+
+def _membership_batch(container: Container, values):
+    import numpy
+    values = numpy.asarray(values)
+    if isinstance(container, (set, frozenset, dict, list, tuple, range)):
+        listed = list(container)
+        members = numpy.array(listed)
+        numeric = members.dtype.kind in 'biufc'
+        # Members like tuples turn into more dimensions, which `isin` would check one scalar at a time.
+        if (
+                members.ndim == 1 and len(members) == len(listed)
+                and members.dtype != object and values.dtype != object
+                and numeric == (values.dtype.kind in 'biufc')
+            ):
+            return numpy.isin(values, members)
+    # Substring checks, mixed types and the compact indexes have no array equivalent, so check each value.
+    return numpy.fromiter((value in container for value in values.flat), dtype=bool, count=values.size).reshape(values.shape)
+
+_INDEX_THRESHOLD = 8
+
+def _membership_index(collection: Container, mode: str | None, error_rate: float) -> Container:
+    """Builds the container that `present` and `absent` check against."""
+    match mode:
+        case 'auto':
+            # Only plain tuples, since they can't change after the index is built, and a
+            # subclass may define its own `__contains__`.
+            if builtins.type(collection) is tuple and len(collection) >= _INDEX_THRESHOLD:
+                try:
+                    return frozenset(collection)
+                except TypeError:
+                    # Unhashable elements, so it has to stay a linear scan.
+                    pass
+            return collection
+        case 'index':
+            return frozenset(collection)
+        case 'bloom':
+            return BloomFilter(collection, error_rate=error_rate)
+        case 'compact':
+            return CompactHashSet(collection)
+        case None:
+            return collection
+        case _:
+            raise ValueError(f'Invalid mode: {mode!r}')
+
+class _membership:
+    __slots__ = ('collection', 'index', 'mode')
+
+    def __init__(self, collection: Container, mode: str | None = 'auto', error_rate: float = 0.01):
+        self.index = _membership_index(collection, mode, error_rate)
+        # The snapshot and the approximate indexes replace the collection entirely.
+        self.collection = self.index if mode in ('index', 'bloom', 'compact') else collection
+        self.mode = mode
+
+    def stats(self) -> dict:
+        """Memory and false positive statistics for the index."""
+        if hasattr(self.index, 'stats'):
+            return {'mode': self.mode, **self.index.stats()}
+        return {
+            'mode': self.mode,
+            'entries': len(self.index) if isinstance(self.index, Sized) else None,
+            'bytes': sys.getsizeof(self.index),
+            'false_positive_rate': 0.0,
+        }
+
 @__all__
-class present:
-    """Creates a function that checks if a value is present in collection."""
-    __slots__ = ('collection',)
+class present(_membership):
+    """Creates a function that checks if a value is present in collection.
+
+    When the collection is a tuple of hashable elements, a `frozenset` is built from it
+    so that checks don't need to scan the collection. Lists are checked as they are,
+    since they can change afterwards; `mode='index'` builds a `frozenset` from any
+    collection of hashable elements, which is a snapshot: later changes to the
+    collection are not seen.
+
+    For very large collections, `mode='bloom'` (a `BloomFilter` with the given `error_rate`)
+    or `mode='compact'` (a `CompactHashSet`) use far less memory than a set, at the cost
+    of occasional false positives. Use `stats()` to see how much memory they use and
+    their expected false positive rate. `mode=None` uses the collection as-is.
+    """
+    __slots__ = ()
 
-    def __init__(self, collection: Container):
-        self.collection = collection
-    
     def __call__(self, value)->bool:
-        return value in self.collection
+        try:
+            return value in self.index
+        except TypeError:
+            # An unhashable value can still be in a list or tuple.
+            return value in self.collection
+
+    def batch(self, values):
+        """Returns a boolean mask of the values in the array that are present in collection."""
+        return _membership_batch(self.index, values)
 
 @__all__
-class absent:
-    """Creates a function that checks if a value is absent from collection."""
-    __slots__ = ('collection',)
+class absent(_membership):
+    """Creates a function that checks if a value is absent from collection.
+
+    Takes the same `mode` and `error_rate` as `present`. Note that with the approximate
+    modes, a false positive means that a value is wrongly reported as not absent.
+    """
+    __slots__ = ()
 
-    def __init__(self, collection: Container):
-        self.collection = collection
-    
     def __call__(self, value)->bool:
-        return value not in self.collection
+        try:
+            return value not in self.index
+        except TypeError:
+            return value not in self.collection
+
+    def batch(self, values):
+        """Returns a boolean mask of the values in the array that are absent from collection."""
+        return ~_membership_batch(self.index, values)
 
 @__all__
 def invertdict(d : dict)->dict:
     """Returns a version of the passed dictionary that has the keys and values swapped."""
     return {v : k for k, v in d.items()}
 
+class _method(partial):
+    """A `partial` that is bound to the instance when it's looked up on one, like a function."""
+    __slots__ = ()
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return MethodType(self, instance)
+
 @__all__
 def prefixargs(fn: Callable[...,Any], *prefix_args, **prefix_kwargs):
     """Creates a function that prefixes the supplied arguments
-    to the arguments passed to the callback."""
-    @wraps(fn)
-    def wrapped(*args, **kwargs):
-        return fn(*(*prefix_args, *args), **{**prefix_kwargs, **kwargs})
-    return wrapped
+    to the arguments passed to the callback.
+    
+    This is a `functools.partial` (with the metadata of `fn`), which binds
+    the arguments in C without building intermediate tuples and dicts. Like
+    a function, it's bound to the instance when used as a method."""
+    return update_wrapper(_method(fn, *prefix_args, **prefix_kwargs), fn)
 
 @__all__
 def appendargs(fn: Callable[..., Any], *post_args, **post_kwargs):
     """Creates function that appends the supplied arguments
     to the arguments passed to the callback."""
-    @wraps(fn)
-    def wrapped(*args, **kwargs):
-        return fn(*(*args, *post_args), **{**kwargs, **post_kwargs})
+    # Only merge keyword arguments when there are some to merge.
+    if post_kwargs:
+        @wraps(fn)
+        def wrapped(*args, **kwargs):
+            return fn(*args, *post_args, **{**kwargs, **post_kwargs})
+    elif post_args:
+        @wraps(fn)
+        def wrapped(*args, **kwargs):
+            return fn(*args, *post_args, **kwargs)
+    else:
+        return update_wrapper(_method(fn), fn)
     return wrapped
 
 @__all__
@@ -211,9 +396,216 @@ def endswith(end: str, __start: SupportsIndex = None, __end: SupportsIndex = Non
     # return endswith
     return appendargs(str.endswith, end, __start, __end)
 
+class _affixes:
+    """Patterns grouped by length, so matching costs one slice and set lookup per distinct length."""
+    __slots__ = ('patterns', '_groups')
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = tuple(dict.fromkeys(patterns))
+        groups = {}
+        for pattern in self.patterns:
+            groups.setdefault(len(pattern), set()).add(pattern)
+        # Longest first, so that `match` finds the longest pattern.
+        self._groups = tuple((length, frozenset(groups[length])) for length in sorted(groups, reverse=True))
+
+    def __call__(self, s: str)->bool:
+        return self.match(s) is not None
+
+    def __repr__(self)->str:
+        return f'{type(self).__name__}({list(self.patterns)!r})'
+
+@__all__
+class startswith_any(_affixes):
+    """Creates a function that checks if a string starts with any of the patterns.
+
+    The cost of a check depends on the number of distinct pattern lengths, not the
+    number of patterns. Use `match` to find out which pattern matched.
+    """
+    __slots__ = ()
+
+    def match(self, s: str)->str | None:
+        """Returns the longest pattern that `s` starts with, or `None`."""
+        size = len(s)
+        for length, group in self._groups:
+            if length <= size and s[:length] in group:
+                return s[:length]
+        return None
+
+@__all__
+class endswith_any(_affixes):
+    """Creates a function that checks if a string ends with any of the patterns.
+
+    The cost of a check depends on the number of distinct pattern lengths, not the
+    number of patterns. Use `match` to find out which pattern matched.
+    """
+    __slots__ = ()
+
+    def match(self, s: str)->str | None:
+        """Returns the longest pattern that `s` ends with, or `None`."""
+        size = len(s)
+        for length, group in self._groups:
+            if length <= size and s[size - length:] in group:
+                return s[size - length:]
+        return None
+
+@__all__
+class contains_any:
+    """Creates a function that checks if a string contains any of the patterns.
+
+    The patterns are compiled into an Aho-Corasick automaton, so a check is a single
+    pass over the string no matter how many patterns there are. Use `search` to find
+    out which pattern matched, or `findall` to get every match.
+    """
+    __slots__ = ('patterns', '_goto', '_fail', '_output', '_outlink')
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = tuple(dict.fromkeys(patterns))
+        # Trie of the patterns: `_goto[node]` maps a character to the next node.
+        goto = [{}]
+        # The pattern that ends at each node, if any.
+        output = [None]
+        for pattern in self.patterns:
+            node = 0
+            for char in pattern:
+                if (nxt := goto[node].get(char)) is None:
+                    nxt = goto[node][char] = len(goto)
+                    goto.append({})
+                    output.append(None)
+                node = nxt
+            output[node] = pattern
+        # `_fail[node]` is the node for the longest proper suffix of node's string that is in the trie.
+        # `_outlink[node]` is the nearest node along the failure links that ends a pattern.
+        fail = [0] * len(goto)
+        outlink = [0] * len(goto)
+        queue = collections.deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in goto[node].items():
+                queue.append(nxt)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[nxt] = goto[state].get(char, 0)
+                outlink[nxt] = fail[nxt] if output[fail[nxt]] is not None else outlink[fail[nxt]]
+        self._goto, self._fail, self._output, self._outlink = goto, fail, output, outlink
+
+    def _scan(self, s: str)->Iterator[Tuple[int, str]]:
+        """Yields `(start, pattern)` for every match, in order of where the match ends."""
+        goto, fail, output, outlink = self._goto, self._fail, self._output, self._outlink
+        if output[0] is not None:
+            # The empty pattern matches at the start.
+            yield (0, output[0])
+        node = 0
+        for end, char in enumerate(s, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            hit = node if output[node] is not None else outlink[node]
+            while hit:
+                pattern = output[hit]
+                yield (end - len(pattern), pattern)
+                hit = outlink[hit]
+
+    def __call__(self, s: str)->bool:
+        return next(self._scan(s), None) is not None
+
+    def search(self, s: str)->str | None:
+        """Returns the first pattern found in `s` (the one that ends first, longest if several do), or `None`."""
+        match = next(self._scan(s), None)
+        return match[1] if match is not None else None
+
+    def findall(self, s: str)->List[Tuple[int, str]]:
+        """Returns a list of `(start, pattern)` for every occurrence of every pattern in `s`."""
+        return list(self._scan(s))
+
+    def __repr__(self)->str:
+        return f'contains_any({list(self.patterns)!r})'
+
+def _do_chunk(action: Callable, chunk: list, unpack: bool):
+    for item in chunk:
+        if isinstance(item, tuple) and unpack:
+            action(*item)
+        else:
+            action(item)
+
+def _do_parallel(action: Callable, seq: Iterable, unpack: bool, executor, workers: int, chunksize: int, maxpending: int, ordered: bool):
+    import concurrent.futures as futures
+    # Everything is checked before a pool is created, so that a bad argument doesn't leak one.
+    if executor not in ('thread', 'process') and not isinstance(executor, futures.Executor):
+        raise ValueError(f'Invalid executor: {executor!r}')
+    if chunksize < 1:
+        raise ValueError(f'chunksize must be at least 1: {chunksize}')
+    if maxpending is not None and maxpending < 1:
+        raise ValueError(f'maxpending must be at least 1: {maxpending}')
+    if workers is not None and workers < 1:
+        raise ValueError(f'workers must be at least 1: {workers}')
+    it = iter(seq)
+    match executor:
+        case 'thread':
+            pool = futures.ThreadPoolExecutor(workers)
+        case 'process':
+            pool = futures.ProcessPoolExecutor(workers)
+        case _:
+            pool = executor
+    if maxpending is None:
+        maxpending = 2 * (workers or getattr(pool, '_max_workers', None) or os.cpu_count() or 1)
+    chunks = iter(lambda: list(itertools.islice(it, chunksize)), [])
+    # Ordered completion waits on the oldest chunk, so errors are raised in input order.
+    # Unordered completion waits on whichever chunk finishes first.
+    pending = collections.deque()
+    try:
+        for chunk in chunks:
+            while len(pending) >= maxpending:
+                if ordered:
+                    pending.popleft().result()
+                else:
+                    done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                        future.result()
+            pending.append(pool.submit(_do_chunk, action, chunk, unpack))
+        if ordered:
+            while pending:
+                pending.popleft().result()
+        else:
+            for future in futures.as_completed(list(pending)):
+                future.result()
+            pending.clear()
+    finally:
+        for future in pending:
+            future.cancel()
+        if pool is not executor:
+            pool.shutdown(wait=True, cancel_futures=True)
+
 @__all__
-def do(action: Callable, seq: Iterable, unpack: bool = True):
-    """Do `action(item)` for every `item` in `seq`."""
+def do(
+        action: Callable,
+        seq: Iterable,
+        unpack: bool = True,
+        executor: Literal['thread', 'process'] | Any = None,
+        workers: int = None,
+        chunksize: int = 1,
+        maxpending: int = None,
+        ordered: bool = True,
+    ):
+    """Do `action(item)` for every `item` in `seq`.
+
+    By default, the actions are done one after the other. Pass `executor='thread'`,
+    `executor='process'` or an existing `concurrent.futures.Executor` to do them in
+    parallel with `workers` workers:
+    - Items are submitted in chunks of `chunksize` to cut down on per-task overhead.
+    - At most `maxpending` chunks (default: twice the number of workers) are in flight
+      at once, so `seq` is only pulled as fast as the workers keep up with it.
+    - The first exception raised by an action is raised here, and the chunks that
+      haven't started are cancelled. With `ordered=True`, chunks are collected in
+      input order, so the exception is from the earliest failing chunk; otherwise
+      it's from whichever failing chunk finishes first.
+    
+    With `executor='process'`, `action` and the items must be picklable.
+    """
+    if executor is not None:
+        _do_parallel(action, seq, unpack, executor, workers, chunksize, maxpending, ordered)
+        return
     for item in seq:
         if isinstance(item, tuple) and unpack:
             action(*item)
@@ -228,6 +620,10 @@ def filterfalse(seq: Iterable):
 @__all__
 def filternone(seq: Iterable):
     """Filter out elements that are None."""
+    if (values := _asbatch(seq)) is not None:
+        # Only object arrays can hold None.
+        yield from (values[_not_none_batch(values)] if values.dtype == object else seq)
+        return
     yield from filter(not_none, seq)
 
 @overload
@@ -237,8 +633,15 @@ def count(seq: Iterable, filter: Callable)->int:...
 @__all__
 def count(seq: Iterable, filter=None)->int:
     if callable(filter):
+        if (
+            (values := _asbatch(seq)) is not None
+            and (mask := _batchmask(filter, values)) is not None
+        ):
+            return int(mask.sum())
         return sum((1 for _ in builtins.filter(filter, seq)))
     else:
+        if isinstance(seq, LazySeq):
+            return seq.length()
         if hasattr(seq, '__len__'):
             return len(seq)
         else:
@@ -295,6 +698,220 @@ def next_or(it, default: Any = None):
 def repeatforever(callback: Callable[..., Any], *args, **kwargs):
     for _ in yieldcall(callback, *args, **kwargs):...
 
+@__all__
+class Pacer:
+    """Works out how long to wait between polls.
+
+    The wait starts at `interval`. Every time a poll comes back falsy or the same as
+    the last one, the wait is multiplied by `backoff`, up to `maxinterval`. As soon as
+    a poll comes back with something new, the wait goes back to `interval`.
+    Each wait is randomly stretched or shrunk by up to `jitter` (a fraction of the wait),
+    so that many pollers don't line up.
+
+    `Pacer(interval, backoff=1)` polls at a fixed interval.
+    """
+    __slots__ = ('interval', 'maxinterval', 'backoff', 'jitter', 'current', '_previous')
+
+    def __init__(self, interval: float = 1.0, maxinterval: float = None, backoff: float = 2.0, jitter: float = 0.0):
+        maxinterval = maxinterval if maxinterval is not None else interval * 60
+        # An interval of 0 could never back off, since the wait is multiplied.
+        if interval <= 0 or maxinterval < interval or backoff < 1 or not 0 <= jitter < 1:
+            raise ValueError(
+                'Invalid pacing: interval must be positive, maxinterval at least interval, '
+                'backoff at least 1, and jitter between 0 and 1.'
+            )
+        self.interval = interval
+        self.maxinterval = maxinterval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.reset()
+
+    def reset(self):
+        self.current = self.interval
+        self._previous = _nothing
+
+    def next(self, result: Any)->float:
+        """Returns how long to wait after a poll that returned `result`."""
+        try:
+            idle = not result or bool(result == self._previous)
+        except Exception:
+            # Results that can't be compared or truth tested count as new.
+            idle = False
+        self._previous = result
+        if idle:
+            self.current = min(self.current * self.backoff, self.maxinterval)
+        else:
+            self.current = self.interval
+        if self.jitter:
+            return self.current * random.uniform(1 - self.jitter, 1 + self.jitter)
+        return self.current
+
+_nothing = object()
+
+def _pacer(pace: Pacer | float)->Pacer:
+    # A `Pacer` that was passed in keeps its state, which may be shared on purpose.
+    if isinstance(pace, Pacer):
+        return pace
+    return Pacer(pace, backoff=1)
+
+@__all__
+def yieldpaced(
+        callback: Callable[..., Any],
+        *args,
+        pace: Pacer | float = 1.0,
+        until: Callable[[Any], bool] = None,
+        stop: threading.Event = None,
+        **kwargs,
+    ):
+    """Like `yieldcall`, but waits between calls instead of calling in a tight loop.
+
+    `pace` is either a `Pacer` (for backoff and jitter) or a fixed interval in seconds,
+    which must be positive. A `Pacer` carries on from its current wait, so call its
+    `reset()` first to start over.
+    The generator ends after a result that `until` returns True for, or when `stop` is set.
+    Setting `stop` also cuts a wait short.
+    ```py
+    for jobs in yieldpaced(queue.fetch, pace=Pacer(0.1, maxinterval=5, jitter=0.1), stop=shutdown):
+        do(process, jobs)
+    ```
+    """
+    pacer = _pacer(pace)
+    while stop is None or not stop.is_set():
+        result = callback(*args, **kwargs)
+        yield result
+        if until is not None and until(result):
+            return
+        delay = pacer.next(result)
+        if stop is not None:
+            if stop.wait(delay):
+                return
+        else:
+            time.sleep(delay)
+
+@__all__
+def repeatpaced(
+        callback: Callable[..., Any],
+        *args,
+        pace: Pacer | float = 1.0,
+        until: Callable[[Any], bool] = None,
+        stop: threading.Event = None,
+        **kwargs,
+    ):
+    """Like `repeatforever`, but paced like `yieldpaced`. Returns the last result."""
+    result = None
+    for result in yieldpaced(callback, *args, pace=pace, until=until, stop=stop, **kwargs):...
+    return result
+
+@__all__
+def tumbling(seq: Iterable, size: int, partial: bool = True)->Iterator[tuple]:
+    """Yields consecutive, non-overlapping windows of `size` items as tuples.
+    
+    If `partial` is True, the last window may have fewer than `size` items."""
+    if size < 1:
+        raise ValueError(f'Window size must be at least 1: {size}')
+    it = iter(seq)
+    while (window := tuple(itertools.islice(it, size))):
+        if len(window) < size and not partial:
+            return
+        yield window
+
+@__all__
+def sliding(seq: Iterable, size: int, step: int = 1)->Iterator[tuple]:
+    """Yields overlapping windows of `size` items as tuples, moving `step` items at a time.
+
+    The window is kept in a ring buffer, so memory stays at `size` items.
+    ```py
+    >>> list(sliding(range(5), 3))
+    [(0, 1, 2), (1, 2, 3), (2, 3, 4)]
+    ```
+    """
+    if size < 1 or step < 1:
+        raise ValueError(f'Window size and step must be at least 1: {size}, {step}')
+    window = collections.deque(maxlen=size)
+    # The number of items until the next window is due.
+    due = size
+    for item in seq:
+        window.append(item)
+        due -= 1
+        if due == 0:
+            yield tuple(window)
+            due = step
+
+@__all__
+def sessions(seq: Iterable, gap: float, key: Callable[[Any], float] = None)->Iterator[list]:
+    """Yields lists of consecutive items where each item is within `gap` of the one before it.
+
+    `key` gets the position of an item (such as a timestamp). By default the item itself is used.
+    """
+    session = []
+    previous = None
+    for item in seq:
+        position = key(item) if key is not None else item
+        if session and position - previous > gap:
+            yield session
+            session = []
+        session.append(item)
+        previous = position
+    if session:
+        yield session
+
+@__all__
+def rollingsum(seq: Iterable, size: int)->Iterator[Any]:
+    """Yields the sum of the last `size` items, once `size` items have been seen.
+
+    Each step adds the new item and subtracts the one that left the window,
+    so with floats the result can drift slightly from a fresh `sum`.
+    """
+    if size < 1:
+        raise ValueError(f'Window size must be at least 1: {size}')
+    window = collections.deque()
+    total = 0
+    for item in seq:
+        window.append(item)
+        total += item
+        if len(window) > size:
+            total -= window.popleft()
+        if len(window) == size:
+            yield total
+
+@__all__
+def rollingmean(seq: Iterable, size: int)->Iterator[float]:
+    """Yields the mean of the last `size` items, once `size` items have been seen."""
+    for total in rollingsum(seq, size):
+        yield total / size
+
+def _rollingextreme(seq: Iterable, size: int, key: Callable[[Any], Any] | None, better: Callable[[Any, Any], bool])->Iterator[Any]:
+    if size < 1:
+        raise ValueError(f'Window size must be at least 1: {size}')
+    # A monotonic deque of (index, key, item). The front is the extreme of the window,
+    # and each item is pushed and popped at most once, so every step is O(1) amortized.
+    # Ties keep the earlier item, like `min` and `max` do.
+    candidates = collections.deque()
+    for index, item in enumerate(seq):
+        k = key(item) if key is not None else item
+        while candidates and better(k, candidates[-1][1]):
+            candidates.pop()
+        candidates.append((index, k, item))
+        if candidates[0][0] <= index - size:
+            candidates.popleft()
+        if index >= size - 1:
+            yield candidates[0][2]
+
+@__all__
+def rollingmin(seq: Iterable, size: int, key: Callable[[Any], Any] = None)->Iterator[Any]:
+    """Yields the smallest of the last `size` items, once `size` items have been seen."""
+    return _rollingextreme(seq, size, key, operator.lt)
+
+@__all__
+def rollingmax(seq: Iterable, size: int, key: Callable[[Any], Any] = None)->Iterator[Any]:
+    """Yields the largest of the last `size` items, once `size` items have been seen."""
+    return _rollingextreme(seq, size, key, operator.gt)
+
+@__all__
+def topk(seq: Iterable, k: int, key: Callable[[Any], Any] = None)->list:
+    """Returns the `k` largest items, largest first, keeping only `k` items in memory."""
+    return heapq.nlargest(k, seq, key=key)
+
 @__all__
 def calltransform(callback: Callable[..., Any], transformer: Callable[..., Tuple[Tuple[Any], Dict[str, Any]]])->Callable[..., Any]:
     """Creates a function that transforms the arguments passed to it before calling the provided callback."""
@@ -304,12 +921,99 @@ def calltransform(callback: Callable[..., Any], transformer: Callable[..., Tuple
         return callback(*args, *kwargs)
     return _callback
 
+def _callstack_result(result):
+    """The general case for unpacking the result of a callable stage in a compiled callstack."""
+    match result:
+        case (tuple(args), dict(kwargs)):
+            return args, kwargs
+        case (tuple(args)):
+            return args, {}
+        case (dict(kwargs)):
+            return (), kwargs
+        case None:
+            return (None,), {}
+        case other:
+            return (other,), {}
+
+def _compile_callstack(stack: Iterable[Callable[...,Any]|Any])->Callable[..., Any]:
+    """Generates a flat function that does the same thing as the interpreted callstack.
+
+    Each stage is classified once. Argument and keyword argument stages that sit between
+    two callables are fused into a single rebuild of `args` and `kwargs`, and the result of
+    each callable is unpacked with fast checks for the common result types before falling
+    back to the same `match` that the interpreted callstack uses.
+    """
+    # Each item is ('call', callable) or ('extend', [nargs...], [nkwargs...])
+    plan = []
+    def extend(nargs = (), nkwargs = None):
+        if not plan or plan[-1][0] != 'extend':
+            plan.append(('extend', [], []))
+        plan[-1][1].extend(nargs)
+        if nkwargs is not None:
+            plan[-1][2].append(nkwargs)
+    for mapper in stack:
+        match mapper:
+            case (tuple(nargs), dict(nkwargs)):
+                extend(nargs, nkwargs)
+            case (tuple(nargs)):
+                extend(nargs)
+            case (dict(nkwargs)):
+                extend(nkwargs=nkwargs)
+            case call if callable(call):
+                plan.append(('call', call))
+            case other:
+                extend((other,))
+    names = {}
+    def const(prefix: str, value)->str:
+        name = f'{prefix}{len(names)}'
+        names[name] = value
+        return name
+    lines = []
+    for step in plan:
+        match step:
+            case ('extend', nargs, nkwargs):
+                if nargs:
+                    lines.append(f'args = (*args, *{const("_a", tuple(nargs))})')
+                if nkwargs:
+                    merged = ', '.join(f'**{const("_k", nkw)}' for nkw in nkwargs)
+                    lines.append(f'kwargs = {{**kwargs, {merged}}}')
+            case ('call', call):
+                lines.extend((
+                    f'result = {const("_s", call)}(*args, **kwargs)',
+                    'if result is None:',
+                    '    args = _none_args',
+                    '    kwargs = _empty',
+                    'elif type(result) is tuple:',
+                    '    if len(result) == 2 and isinstance(result[0], tuple) and isinstance(result[1], dict):',
+                    '        args, kwargs = result',
+                    '    else:',
+                    '        args = result',
+                    '        kwargs = _empty',
+                    'elif type(result) is dict:',
+                    '    args = ()',
+                    '    kwargs = result',
+                    'else:',
+                    '    args, kwargs = _callstack_result(result)',
+                ))
+    lines.append('return args if args else None')
+    body = ''.join(f'        {line}\n' for line in lines)
+    source = (
+        f'def _factory(_none_args, _empty, _callstack_result, {", ".join(names)}):\n'
+        f'    def callstack(*args, **kwargs):\n'
+        f'{body}'
+        f'    return callstack\n'
+    )
+    namespace = {}
+    exec(builtins.compile(source, '<callstack>', 'exec'), namespace)
+    # `_empty` is never mutated by the generated code, so it can be shared.
+    return namespace['_factory']((None,), {}, _callstack_result, *names.values())
+
 @overload
-def callstack(iterable: Iterable[Callable[...,Any]|Any])->Callable[[Any], Any]:...
+def callstack(iterable: Iterable[Callable[...,Any]|Any], *, compile: bool = False)->Callable[[Any], Any]:...
 @overload
-def callstack(*stack)->Callable[[Any], Any]:...
+def callstack(*stack, compile: bool = False)->Callable[[Any], Any]:...
 @__all__
-def callstack(iterable_or_callable, *stack)->Callable[[Any], Any]:
+def callstack(iterable_or_callable, *stack, compile: bool = False)->Callable[[Any], Any]:
     """Calls each function along the callstack with the result of the previous.
 
     This function is a bit complicated, so it would be easier to read the code, but I'll
@@ -326,6 +1030,11 @@ def callstack(iterable_or_callable, *stack)->Callable[[Any], Any]:
     transformer = callstack(get_pos, vec2, multiply_vec)
     print(transformer())
     ```
+    If you are going to call the callstack many times, pass `compile=True`.
+    The stages are classified once and a specialized function is generated
+    that gives the same results without matching every stage on every call.
+    The stages are read when the callstack is compiled, so a one-shot iterator
+    can be used as the stack.
     """
     if callable(iterable_or_callable):
         stack = (iterable_or_callable, *stack)
@@ -333,6 +1042,8 @@ def callstack(iterable_or_callable, *stack)->Callable[[Any], Any]:
         stack = iterable_or_callable
     else:
         raise TypeError("Supplied incorrect values or something, idk.")
+    if compile:
+        return _compile_callstack(stack)
     def callstack(*args, **kwargs):
         for mapper in stack:
             match mapper:
@@ -400,6 +1111,101 @@ def call_or(maybe_fn, *args, **kwargs):
 
 R = TypeVar('R')
 
+def _argskey(*args, **kwargs)->Hashable:
+    return (args, frozenset(kwargs.items())) if kwargs else args
+
+class _PredicateCache:
+    """Holds the results of a `conditional` predicate for a while.
+
+    Results are held for `ttl` seconds (forever if `ttl` is `None`) or until `invalidate`
+    is called. When the predicate takes the arguments, results are held per `key(*args, **kwargs)`,
+    and at most `maxsize` of them are held at once.
+    """
+    __slots__ = ('predicate', 'takes_args', 'ttl', 'key', 'maxsize', '_results', '_pending', '_generation', '_lock')
+
+    def __init__(self, predicate: Callable[...,bool], takes_args: bool, ttl: float | None, key: Callable[...,Hashable] | None, maxsize: int):
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f'The cache duration must be positive: {ttl}')
+        if maxsize < 1:
+            raise ValueError(f'The cache size must be at least 1: {maxsize}')
+        self.predicate = predicate
+        self.takes_args = takes_args
+        self.ttl = ttl
+        self.key = (key or _argskey) if takes_args else None
+        self.maxsize = maxsize
+        # key -> (result, expiry time or None)
+        self._results = {}
+        # key -> the lock held while the predicate is evaluated for it, so that concurrent
+        # callers with the same key wait for one evaluation instead of all evaluating it,
+        # while other keys are evaluated at the same time.
+        self._pending = {}
+        # Bumped by `invalidate`, so that an evaluation that started before it isn't held.
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs)->bool:
+        key = self.key(*args, **kwargs) if self.key is not None else None
+        if (entry := self._results.get(key)) is not None and (entry[1] is None or entry[1] > time.monotonic()):
+            return entry[0]
+        with self._lock:
+            if (pending := self._pending.get(key)) is None:
+                pending = self._pending[key] = threading.RLock()
+        with pending:
+            if (entry := self._results.get(key)) is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                return entry[0]
+            generation = self._generation
+            try:
+                result = self.predicate(*args, **kwargs) if self.takes_args else self.predicate()
+            except BaseException:
+                with self._lock:
+                    if self._pending.get(key) is pending:
+                        del self._pending[key]
+                raise
+            # The result is held before the lock for the key is dropped, so that a caller
+            # that comes in between finds the result instead of evaluating it again.
+            with self._lock:
+                if generation == self._generation:
+                    self._results.pop(key, None)
+                    while len(self._results) >= self.maxsize:
+                        # Dicts keep insertion order, so this is the oldest result.
+                        del self._results[next(iter(self._results))]
+                    self._results[key] = (result, None if self.ttl is None else time.monotonic() + self.ttl)
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+            return result
+
+    def invalidate(self, *args, **kwargs):
+        """Forgets the held results, or only the result for the given arguments if any are given."""
+        with self._lock:
+            self._generation += 1
+            if (args or kwargs) and self.key is not None:
+                self._results.pop(self.key(*args, **kwargs), None)
+            else:
+                self._results.clear()
+
+def _conditional(predicate: Callable[...,bool], target: Callable[...,R], takes_args: bool, cache: bool | float, key: Callable[...,Hashable] | None, maxsize: int, exact: bool)->Callable[..., R]:
+    if not isinstance(cache, (bool, int, float)):
+        raise TypeError(f'cache must be a bool or a number of seconds: {cache!r}')
+    if cache is not False:
+        predicate = _PredicateCache(predicate, takes_args, None if cache is True else cache, key, maxsize)
+    if exact:
+        # Imported here because `decorators` imports `fp`.
+        from .decorators import hooks, wrap
+        conditional = wrap(target, hooks(guard=predicate, passargs=takes_args))
+    elif takes_args:
+        @wraps(target)
+        def conditional(*args, **kwargs):
+            if predicate(*args, **kwargs):
+                return target(*args, **kwargs)
+    else:
+        @wraps(target)
+        def conditional(*args, **kwargs):
+            if predicate():
+                return target(*args, **kwargs)
+    if cache is not False:
+        conditional.invalidate = predicate.invalidate
+    return conditional
+
 @__all__
 @overload
 def conditional(predicate: Callable[...,bool]):
@@ -409,12 +1215,16 @@ def conditional(predicate: Callable[...,bool]):
         predicate (Callable[...,bool]): The conditional predicate.
     """
 @overload
-def conditional(predicate: Callable[...,bool], takes_args: bool = True):
+def conditional(predicate: Callable[...,bool], takes_args: bool = True, *, cache: bool | float = False, key: Callable[...,Hashable] = None, maxsize: int = 1024, exact: bool = False):
     """A decorator for a function that is only callable if predicate is `True`.
 
     Args:
         predicate (Callable[...,bool]): The conditional predicate. (Will take the arguments)
         takes_args (bool, optional): Determines if the arguments are passed to the predicate. Defaults to True.
+        cache (bool | float, optional): Seconds to hold the predicate's result for, or `True` to hold it until invalidated. Defaults to False.
+        key (Callable[...,Hashable], optional): Makes the cache key from the arguments when `takes_args` is True.
+        maxsize (int, optional): The most argument keys to hold results for, at least 1. Defaults to 1024.
+        exact (bool, optional): Generates the wrapper with `decorators.wrap`. Defaults to False.
     """
 @overload
 def conditional(predicate: Callable[...,bool], target: Callable[...,R])->Callable[..., R]:
@@ -425,32 +1235,37 @@ def conditional(predicate: Callable[...,bool], target: Callable[...,R])->Callabl
         target (Callable[...,Any]): The target callable.
     """
 @overload
-def conditional(predicate: Callable[...,bool], target: Callable[...,R], takes_args: bool = True)->Callable[..., R]:...
-def conditional(predicate: Callable[...,bool], first = True, takes_args = True):
-    """Creates a function that is only called if a predicate is met."""
+def conditional(predicate: Callable[...,bool], target: Callable[...,R], takes_args: bool = True, *, cache: bool | float = False, key: Callable[...,Hashable] = None, maxsize: int = 1024, exact: bool = False)->Callable[..., R]:...
+def conditional(predicate: Callable[...,bool], first = True, takes_args = True, *, cache: bool | float = False, key: Callable[...,Hashable] = None, maxsize: int = 1024, exact: bool = False):
+    """Creates a function that is only called if a predicate is met.
+
+    If the predicate is expensive and its result rarely changes, pass `cache` to hold
+    its result for that many seconds, or `cache=True` to hold it until the returned
+    function's `invalidate()` is called. When the predicate takes the arguments,
+    results are held per argument key (made by `key`, or from the arguments themselves,
+    which must then be hashable), and `invalidate(*args, **kwargs)` forgets a single key.
+    `cache` must be a bool or a number; `None` is rejected rather than read as "forever".
+    The cache is thread-safe, and the predicate is evaluated outside of its lock, once
+    per key at a time.
+
+    With `exact=True`, the wrapper is generated with the same parameters as the target
+    (see `decorators.wrap`), which avoids packing the arguments on every call, and
+    stacked exact conditionals are collapsed into one function.
+    
+    ```py
+    @conditional(feature_enabled, False, cache=60)
+    def new_behaviour():...
+    
+    new_behaviour.invalidate()
+    ```
+    """
     match (first, takes_args):
         case (bool(takes_args), _):
             def decorator(target):
-                @wraps(target)
-                def conditional(*args, **kwargs):
-                    if takes_args:
-                        active = predicate(*args, **kwargs)
-                    else:
-                        active = predicate()
-                    if active:
-                        return target(*args, **kwargs)
-                return conditional
+                return _conditional(predicate, target, takes_args, cache, key, maxsize, exact)
             return decorator
         case (target, bool(takes_args)) if callable(target):
-            @wraps(target)
-            def conditional(*args, **kwargs):
-                if takes_args:
-                    active = predicate(*args, **kwargs)
-                else:
-                    active = predicate()
-                if active:
-                    return target(*args, **kwargs)
-            return conditional
+            return _conditional(predicate, target, takes_args, cache, key, maxsize, exact)
         case _:
             raise ValueError('Invalid arguments.')
 
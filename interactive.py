@@ -4,6 +4,7 @@ Some useful stuff for when using an interactive interpreter.
 from typing import *
 from typing_extensions import *
 from .decorators import *
+from .modutil import lazy_import
 
 # System
 import os, sys
@@ -25,9 +26,13 @@ import importlib
 # For handling text
 import re, string
 # For handling data
-import json
+# (json, numpy, requests and pyperclip are only loaded when they're first used.)
+json = lazy_import('json')
 # For mathematics
-import math, numpy as np
+import math
+try:
+    np = lazy_import('numpy')
+except ImportError: pass
 # Threading
 import threading
 from threading import Thread
@@ -49,23 +54,26 @@ days_ago = lambda days: today() - timedelta(days = days)
 
 # For handling web requests
 try:
-    import requests
+    requests = lazy_import('requests')
 except ImportError: pass
 # For handline the clipboard
 try:
-    from pyperclip import paste, copy as _copy
+    _pyperclip = lazy_import('pyperclip')
+    def paste() -> str:
+        return _pyperclip.paste()
+
     def copy(data: Any):
-        _copy(str(data))
+        _pyperclip.copy(str(data))
     
     def copyr(data: Any):
-        _copy(repr(data))
+        _pyperclip.copy(repr(data))
 except ImportError: pass
 
 _prelude = list(filter(lambda key: not key.startswith('_'), globals().keys()))
 
 from .modutil import Includer
 
-__all__ = Includer(_prelude)
+__all__ = Includer(_prelude, exclude=['lazy_import'])
 
 # Globals
 
@@ -77,6 +85,6 @@ def inject_into_main(replace: bool = True):
     for name in __all__:
         if (
             replace 
-            or not hasattr(name, __main__)
+            or not hasattr(__main__, name)
         ):
-            setattr(name, __main__, globals()[name])
\ No newline at end of file
+            setattr(__main__, name, globals()[name])
\ No newline at end of file
@@ -3,8 +3,12 @@
 from typing import *
 from typing_extensions import *
 
+import os
 import sys
 import importlib
+import importlib.util
+import threading
+import time
 
 from types import ModuleType
 
@@ -139,7 +143,63 @@ class Includer(list):
                 self.append(target)
                 return target
 
-__all__ = (include := Includer('Includer, IncludeError'))
+__all__ = (include := Includer('Includer', 'IncludeError'))
+
+_lazy_lock = threading.Lock()
+# id(module) -> (module, the class it has until it's loaded), for the modules from `lazy_import`.
+_lazy_modules: Dict[int, Tuple[ModuleType, type]] = {}
+
+@include
+def lazy_import(name: str, package: str = None) -> ModuleType:
+    """Imports a module that isn't loaded until one of its attributes is accessed.
+
+    The module is found (so a missing module still raises `ModuleNotFoundError` right
+    away) and put in `sys.modules`, but its code doesn't run until it's first used,
+    by way of `importlib.util.LazyLoader`. If the module was already imported, it's
+    returned as is. The parent packages of a submodule are imported normally.
+    ```python
+    np = lazy_import('numpy')
+    ```
+    """
+    name = importlib.util.resolve_name(name, package) if name.startswith('.') else name
+    with _lazy_lock:
+        if (module := sys.modules.get(name)) is not None:
+            return module
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ModuleNotFoundError(f'No module named {name!r}', name=name)
+        if spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+            # Namespace packages and old-style loaders can't be loaded lazily.
+            return importlib.import_module(name)
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loader.exec_module(module)
+        _lazy_modules[id(module)] = (module, type(module))
+        if '.' in name:
+            parent, _, child = name.rpartition('.')
+            setattr(sys.modules[parent], child, module)
+        return module
+
+@include
+def is_loaded(module: ModuleType | str) -> bool:
+    """Whether a module (such as one from `lazy_import`) has run its code.
+
+    This never loads the module, which touching any of its attributes would (even
+    `isinstance` looks at `__class__`, so only `type` is used on it).
+    """
+    if issubclass(type(module), str):
+        if (module := sys.modules.get(module)) is None:
+            return False
+    if (entry := _lazy_modules.get(id(module))) is None or entry[0] is not module:
+        return True
+    # Once it's loaded, the module gets its original class back.
+    if type(module) is not entry[1]:
+        with _lazy_lock:
+            _lazy_modules.pop(id(module), None)
+        return True
+    return False
 
 @include
 def modulereloader(module, returns_module: bool = False):
@@ -162,4 +222,735 @@ def modulereloader(module, returns_module: bool = False):
         module = importlib.reload(module)
         if returns_module:
             return module
-    return reloader
\ No newline at end of file
+    return reloader
+
+@include
+class ImportNode:
+    """One module that was imported (or reloaded) while an `ImportProfiler` was running.
+
+    `seconds` and `memory` include the imports that happened while the module ran,
+    which are its `children`; `self_seconds` and `self_memory` don't. `memory` is the
+    change in memory traced by `tracemalloc`, or None if it wasn't traced.
+    """
+    __slots__ = ('name', 'reload', 'failed', 'seconds', 'memory', 'children')
+
+    def __init__(self, name: str, reload: bool = False):
+        self.name = name
+        self.reload = reload
+        self.failed = False
+        self.seconds = 0.0
+        self.memory = None
+        self.children: List[ImportNode] = []
+
+    @property
+    def self_seconds(self) -> float:
+        return self.seconds - sum(child.seconds for child in self.children)
+
+    @property
+    def self_memory(self) -> int | None:
+        if self.memory is None:
+            return None
+        return self.memory - sum(child.memory or 0 for child in self.children)
+
+    def walk(self, depth: int = 0) -> Iterator[Tuple[int, 'ImportNode']]:
+        """Yields `(depth, node)` for this node and every node under it."""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'reload': self.reload,
+            'failed': self.failed,
+            'seconds': self.seconds,
+            'self_seconds': self.self_seconds,
+            'memory': self.memory,
+            'self_memory': self.self_memory,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+    def __repr__(self) -> str:
+        return f'ImportNode({self.name!r}, {self.seconds * 1000:.3f} ms)'
+
+class _TimedLoader:
+    """Stands in for a module's loader while the module runs, and times it."""
+    def __init__(self, loader, profiler: 'ImportProfiler', reload: bool):
+        self.loader = loader
+        self.profiler = profiler
+        self.reload = reload
+
+    def __getattr__(self, name: str):
+        return getattr(self.loader, name)
+
+    def exec_module(self, module: ModuleType):
+        try:
+            self.profiler._run(module.__name__, self.reload, self.loader.exec_module, module)
+        finally:
+            # Don't leave the stand-in on the module.
+            if getattr(module.__spec__, 'loader', None) is self:
+                module.__spec__.loader = self.loader
+            if getattr(module, '__loader__', None) is self:
+                module.__loader__ = self.loader
+
+class _ProfilingFinder:
+    """A meta path finder that asks the other finders, and wraps the loader they find."""
+    def __init__(self, profiler: 'ImportProfiler'):
+        self.profiler = profiler
+
+    def find_spec(self, name: str, path = None, target: ModuleType = None):
+        for finder in list(sys.meta_path):
+            if finder is self or (find := getattr(finder, 'find_spec', None)) is None:
+                continue
+            if (spec := find(name, path, target)) is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            # A `target` means that the module is being reloaded.
+            spec.loader = _TimedLoader(spec.loader, self.profiler, target is not None)
+        return spec
+
+    def invalidate_caches(self):...
+
+@include
+class ImportProfiler:
+    """Records how long each module takes to import, as a tree of `ImportNode`s.
+
+    Every import and `importlib.reload` (which includes `modulereloader`) that happens
+    while the profiler is running is recorded, from any thread. Modules that were
+    already imported aren't imported again, so they don't show up. With `memory=True`,
+    the memory that each module allocates is traced with `tracemalloc`, which makes
+    imports a lot slower.
+    ```python
+    with ImportProfiler() as profiler:
+        import toolbox.interactive
+    print(profiler.report())
+    ```
+    """
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.roots: List[ImportNode] = []
+        self._finder = _ProfilingFinder(self)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started_tracing = False
+
+    def start(self) -> Self:
+        if self._finder not in sys.meta_path:
+            # Imported here, since it imports pickle and the rest of this module is needed at startup.
+            import tracemalloc
+            if self.memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            sys.meta_path.insert(0, self._finder)
+        return self
+
+    def stop(self):
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        if self._started_tracing:
+            import tracemalloc
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self) -> Self:
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self, name: str, reload: bool, execute: Callable[[ModuleType], Any], module: ModuleType):
+        try:
+            stack = self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+        node = ImportNode(name, reload)
+        if stack:
+            stack[-1].children.append(node)
+        else:
+            with self._lock:
+                self.roots.append(node)
+        stack.append(node)
+        memory = None
+        if self.memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            execute(module)
+        except BaseException:
+            node.failed = True
+            raise
+        finally:
+            node.seconds = time.perf_counter() - start
+            if memory is not None:
+                node.memory = tracemalloc.get_traced_memory()[0] - memory
+            stack.pop()
+
+    def nodes(self) -> Iterator[Tuple[int, ImportNode]]:
+        """Yields `(depth, node)` for every recorded import, depth first."""
+        for root in list(self.roots):
+            yield from root.walk()
+
+    def totals(self) -> Dict[str, dict]:
+        """The self and cumulative totals for each module name, summed over every time it was imported."""
+        totals = {}
+        for _, node in self.nodes():
+            total = totals.setdefault(node.name, {'count': 0, 'seconds': 0.0, 'self_seconds': 0.0, 'memory': None, 'self_memory': None})
+            total['count'] += 1
+            total['seconds'] += node.seconds
+            total['self_seconds'] += node.self_seconds
+            if node.memory is not None:
+                total['memory'] = (total['memory'] or 0) + node.memory
+                total['self_memory'] = (total['self_memory'] or 0) + node.self_memory
+        return totals
+
+    def report(self, sort: Literal['seconds', 'self_seconds'] = 'seconds', tree: bool = True, limit: int = None) -> str:
+        """Formats the imports as a table.
+
+        As a tree, each module's imports are nested under it, sorted by `sort`. Otherwise,
+        the modules are listed by their totals, sorted by `sort`, with at most `limit` rows.
+        """
+        def memory(value: int | None) -> str:
+            return f'{value / 1024:12.1f}' if value is not None else f'{"-":>12}'
+        lines = [f'{"cumulative ms":>13} {"self ms":>10} {"memory KiB":>12} {"self KiB":>12}  module']
+        if tree:
+            def visit(node: ImportNode, depth: int):
+                flag = ' (reload)' if node.reload else ' (failed)' if node.failed else ''
+                lines.append(
+                    f'{node.seconds * 1000:13.3f} {node.self_seconds * 1000:10.3f} '
+                    f'{memory(node.memory)} {memory(node.self_memory)}  {"  " * depth}{node.name}{flag}'
+                )
+                for child in sorted(node.children, key=lambda child: getattr(child, sort), reverse=True):
+                    visit(child, depth + 1)
+            for root in sorted(self.roots, key=lambda root: getattr(root, sort), reverse=True):
+                visit(root, 0)
+        else:
+            rows = sorted(self.totals().items(), key=lambda item: item[1][sort], reverse=True)
+            for name, total in rows[:limit]:
+                count = f' (x{total["count"]})' if total['count'] > 1 else ''
+                lines.append(
+                    f'{total["seconds"] * 1000:13.3f} {total["self_seconds"] * 1000:10.3f} '
+                    f'{memory(total["memory"])} {memory(total["self_memory"])}  {name}{count}'
+                )
+        if tree and limit is not None:
+            lines = lines[:limit + 1]
+        return '\n'.join(lines)
+
+    def to_json(self, indent: int = 2) -> str:
+        import json
+        return json.dumps({'imports': [root.to_dict() for root in self.roots], 'totals': self.totals()}, indent=indent)
+
+def _module_imports(module: ModuleType, source: bytes) -> Tuple[Set[str], List[Tuple[str, str, str]]]:
+    """The modules that `source` imports, and its `from x import y as z` statements as `(x, y, z)`."""
+    import ast
+    package = module.__package__ or ''
+    imports = set()
+    names = []
+    for node in ast.walk(ast.parse(source)):
+        match node:
+            case ast.Import(names=aliases):
+                imports.update(alias.name for alias in aliases)
+            case ast.ImportFrom(module=name, names=aliases, level=level):
+                if level:
+                    try:
+                        name = importlib.util.resolve_name('.' * level + (name or ''), package)
+                    except ImportError:
+                        continue
+                imports.add(name)
+                for alias in aliases:
+                    # `from package import submodule` imports the submodule too.
+                    imports.add(f'{name}.{alias.name}')
+                    names.append((name, alias.name, alias.asname or alias.name))
+    return imports, names
+
+class _Watched:
+    """What a `HotReloader` knows about one module's source file."""
+    __slots__ = ('path', 'stat', 'digest', 'imports', 'names')
+
+    def __init__(self, path: str, stat: Tuple[int, int], digest: str, imports: Set[str], names: List[Tuple[str, str, str]]):
+        self.path = path
+        self.stat = stat
+        self.digest = digest
+        self.imports = imports
+        self.names = names
+
+@include
+class HotReloader:
+    """Reloads the modules of a package whose source files changed, and the modules that depend on them.
+
+    Changes are found by checking each file's modification time and size, and only
+    files where those changed are read and hashed, so touching a file without changing
+    it doesn't count. The import graph between the watched modules is read from their
+    source with `ast`. Calling the reloader reloads the changed modules and the modules
+    that import them (directly or not), dependencies first. If a reload raises, the
+    names are still rebound to the modules that were reloaded before the error is raised.
+
+    With `rebind_only=True`, the modules that depend on the changed ones aren't
+    reloaded; instead, the names they got with `from x import y` are rebound to the
+    new objects. Either way, names in `namespaces` (by default `__main__`) that refer
+    to objects from a reloaded module are rebound to the new objects with the same names.
+
+    Modules are watched once they've been imported.
+    ```python
+    reload = HotReloader('toolbox')
+    ...
+    reload() # Returns the names of the reloaded modules.
+    ```
+    """
+    def __init__(
+            self,
+            package: str | ModuleType,
+            *,
+            rebind_only: bool = False,
+            namespaces: Iterable[ModuleType | dict] = None,
+        ):
+        self.package = package if isinstance(package, str) else package.__name__
+        self.rebind_only = rebind_only
+        if namespaces is None:
+            namespaces = [m for m in (sys.modules.get('__main__'),) if m is not None]
+        self.namespaces = list(namespaces)
+        self.watched: Dict[str, _Watched] = {}
+        self._lock = threading.RLock()
+        self.scan()
+
+    def _modules(self) -> Iterator[Tuple[str, ModuleType, str]]:
+        prefix = self.package + '.'
+        for name, module in list(sys.modules.items()):
+            if module is None or (name != self.package and not name.startswith(prefix)):
+                continue
+            path = getattr(module, '__file__', None)
+            if path and path.endswith('.py'):
+                yield name, module, path
+
+    def _read(self, module: ModuleType, path: str, stat: Tuple[int, int]) -> _Watched:
+        import hashlib
+        with open(path, 'rb') as file:
+            source = file.read()
+        try:
+            imports, names = _module_imports(module, source)
+        except SyntaxError:
+            # It can't be reloaded like this anyway, so reloading will raise the error.
+            imports, names = set(), []
+        return _Watched(path, stat, hashlib.sha256(source).hexdigest(), imports, names)
+
+    def scan(self) -> Dict[str, _Watched]:
+        """Finds the watched modules whose source changed, without recording the change.
+
+        New modules are recorded as they are, and don't count as changed.
+        """
+        changed = {}
+        with self._lock:
+            for name, module, path in self._modules():
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                stat = (st.st_mtime_ns, st.st_size)
+                if (known := self.watched.get(name)) is None:
+                    self.watched[name] = self._read(module, path, stat)
+                    continue
+                if known.stat == stat and known.path == path:
+                    continue
+                current = self._read(module, path, stat)
+                if current.digest == known.digest:
+                    # Touched, but not changed.
+                    known.stat = stat
+                    continue
+                changed[name] = current
+        return changed
+
+    def graph(self) -> Dict[str, Set[str]]:
+        """Each watched module, and the watched modules it imports."""
+        with self._lock:
+            return {
+                name: {dep for dep in watched.imports if dep in self.watched and dep != name}
+                for name, watched in self.watched.items()
+            }
+
+    def dependents(self, names: Iterable[str], graph: Dict[str, Set[str]] = None) -> Set[str]:
+        """The modules in `names` and every watched module that imports any of them, directly or not."""
+        graph = self.graph() if graph is None else graph
+        reverse = {}
+        for name, deps in graph.items():
+            for dep in deps:
+                reverse.setdefault(dep, set()).add(name)
+        found = set()
+        pending = list(names)
+        while pending:
+            if (name := pending.pop()) not in found:
+                found.add(name)
+                pending.extend(reverse.get(name, ()))
+        return found
+
+    @staticmethod
+    def _order(names: Set[str], graph: Dict[str, Set[str]]) -> List[str]:
+        """Sorts `names` so that every module comes after the modules it imports (as far as cycles allow)."""
+        remaining = {name: graph.get(name, set()) & names for name in names}
+        order = []
+        while remaining:
+            ready = sorted(name for name, deps in remaining.items() if not deps)
+            if not ready:
+                # An import cycle; break it at the module with the fewest dependencies.
+                ready = [min(remaining, key=lambda name: (len(remaining[name]), name))]
+            for name in ready:
+                del remaining[name]
+                order.append(name)
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    def _rebind(self, replaced: Dict[int, Tuple[Any, Any]], namespace: dict):
+        for key, value in list(namespace.items()):
+            if (pair := replaced.get(id(value))) is not None and pair[0] is value:
+                namespace[key] = pair[1]
+
+    def reload(self) -> List[str]:
+        """Reloads the changed modules and their dependents, and returns their names in the order they were reloaded."""
+        with self._lock:
+            changed = self.scan()
+            if not changed:
+                return []
+            graph = self.graph()
+            # The changed modules' imports may have changed too.
+            for name, watched in changed.items():
+                graph[name] = {dep for dep in watched.imports if dep in self.watched and dep != name}
+            affected = self.dependents(changed, graph)
+            targets = affected if not self.rebind_only else set(changed)
+            reloaded = []
+            replaced = {}
+            try:
+                for name in self._order(targets, graph):
+                    module = sys.modules[name]
+                    old = dict(module.__dict__)
+                    try:
+                        module = modulereloader(module, returns_module=True)()
+                    except BaseException:
+                        # Its source may be put back the way it was, which wouldn't
+                        # count as a change, so it's marked as changed for next time.
+                        if (watched := self.watched.get(name)) is not None:
+                            watched.stat = None
+                            watched.digest = None
+                        raise
+                    if name in changed:
+                        self.watched[name] = changed[name]
+                    reloaded.append(name)
+                    for key, value in old.items():
+                        new = module.__dict__.get(key, value)
+                        if new is not value and not key.startswith('__'):
+                            replaced[id(value)] = (value, new)
+            finally:
+                # Even if a reload failed part way, the names are pointed at what was
+                # reloaded, so nothing is left holding a mix of old and new objects.
+                # The module that failed is tried again next time.
+                if self.rebind_only:
+                    for name in affected - targets:
+                        self._rebind_from_imports(name, set(reloaded))
+                for namespace in self.namespaces:
+                    self._rebind(replaced, namespace if isinstance(namespace, dict) else namespace.__dict__)
+            return reloaded
+
+    def _rebind_from_imports(self, name: str, reloaded: Set[str]):
+        """Rebinds the names that module `name` imported from the reloaded modules."""
+        module = sys.modules[name]
+        for source, attr, alias in self.watched[name].names:
+            if source not in reloaded:
+                continue
+            new = sys.modules[source]
+            if attr == '*':
+                public = getattr(new, '__all__', None) or [key for key in vars(new) if not key.startswith('_')]
+                for key in public:
+                    if hasattr(new, key):
+                        setattr(module, key, getattr(new, key))
+            elif hasattr(new, attr):
+                setattr(module, alias, getattr(new, attr))
+
+    __call__ = reload
+
+    def watch(self, interval: float = 1.0, stop: threading.Event = None, callback: Callable[[List[str]], Any] = None):
+        """Checks for changes every `interval` seconds until `stop` is set, and calls `callback` with what was reloaded."""
+        stop = stop or threading.Event()
+        while not stop.wait(interval):
+            if (reloaded := self.reload()) and callback is not None:
+                callback(reloaded)
+
+class _ExportScanner:
+    """Reads what a module puts in `__all__` from its syntax tree, without running it."""
+    def __init__(self):
+        # The names that refer to the module's `Includer` (`__all__`, and the walrus alias).
+        self.includers = set()
+        self.names: List[str] = []
+        self.explicit = False
+        self.dynamic = False
+        self.public: List[str] = []
+
+    def add(self, node) -> bool:
+        """Adds what an argument to the includer names, and returns whether it could be read."""
+        import ast
+        match node:
+            case ast.Constant(value=str(name)):
+                self.names.append(name)
+            case ast.Name(id=name):
+                # Assumes that the object's `__name__` is the name it's bound to.
+                self.names.append(name)
+            case ast.List(elts=items) | ast.Tuple(elts=items) | ast.Set(elts=items):
+                return all([self.add(item) for item in items])
+            case ast.Starred(value=value):
+                return self.add(value)
+            case _:
+                self.dynamic = True
+                return False
+        return True
+
+    def includer(self, node) -> bool:
+        """Whether `node` is a call to `Includer(...)`, which is read if it is."""
+        import ast
+        match node:
+            case ast.Call(func=ast.Name(id='Includer') | ast.Attribute(attr='Includer'), args=args, keywords=keywords):
+                for keyword in keywords:
+                    if keyword.arg == 'include_globals' or keyword.arg == 'exclude' or keyword.arg is None:
+                        self.dynamic = True
+                if len(args) == 1 and isinstance(args[0], ast.Name):
+                    # Either one object, or a variable holding many names.
+                    self.dynamic = True
+                else:
+                    for arg in args:
+                        self.add(arg)
+                return True
+        return False
+
+    def is_includer(self, node) -> bool:
+        import ast
+        return isinstance(node, ast.Name) and node.id in self.includers
+
+    def decorator(self, node, name: str):
+        import ast
+        match node:
+            case _ if self.is_includer(node):
+                self.names.append(name)
+            case ast.Call(func=func, args=[], keywords=[ast.keyword(arg='alias', value=ast.Constant(value=str(alias)))]) if self.is_includer(func):
+                self.names.append(alias)
+            case ast.Call(func=func, args=[ast.Constant(value=str(alias))], keywords=[]) if self.is_includer(func):
+                self.names.append(alias)
+
+    def assign(self, targets: list, value):
+        import ast
+        if not any(isinstance(target, ast.Name) and target.id == '__all__' for target in targets):
+            for target in targets:
+                for node in ast.walk(target):
+                    if isinstance(node, ast.Name) and not node.id.startswith('_'):
+                        self.public.append(node.id)
+            return
+        self.explicit = True
+        self.includers.add('__all__')
+        match value:
+            case ast.NamedExpr(target=ast.Name(id=alias), value=inner) if self.includer(inner):
+                self.includers.add(alias)
+            case _ if self.includer(value):
+                pass
+            case _:
+                # A plain list or tuple replaces whatever was there.
+                self.names = []
+                self.add(value)
+
+    def statement(self, node):
+        import ast
+        match node:
+            case ast.FunctionDef(name=name) | ast.AsyncFunctionDef(name=name) | ast.ClassDef(name=name):
+                for decorator in node.decorator_list:
+                    self.decorator(decorator, name)
+                if not name.startswith('_'):
+                    self.public.append(name)
+            case ast.Assign(targets=targets, value=value):
+                self.assign(targets, value)
+            case ast.AnnAssign(target=target, value=value) if value is not None:
+                self.assign([target], value)
+            case ast.AugAssign(target=ast.Name(id='__all__'), op=ast.Add(), value=value):
+                self.add(value)
+            case ast.Expr(value=ast.Call(func=ast.Attribute(value=owner, attr=method), args=args)) if self.is_includer(owner):
+                match method:
+                    case 'append' | 'include' | 'extend':
+                        for arg in args:
+                            self.add(arg)
+                    case 'remove':
+                        for arg in args:
+                            if isinstance(arg, ast.Constant) and arg.value in self.names:
+                                self.names.remove(arg.value)
+                    case _:
+                        self.dynamic = True
+            case ast.Expr(value=ast.Call(func=func, args=args)) if self.is_includer(func):
+                for arg in args:
+                    self.add(arg)
+            case ast.Import(names=aliases) | ast.ImportFrom(names=aliases):
+                for alias in aliases:
+                    name = alias.asname or alias.name.partition('.')[0]
+                    if name != '*' and not name.startswith('_'):
+                        self.public.append(name)
+            case ast.If(body=body, orelse=orelse):
+                self.statements(body)
+                self.statements(orelse)
+            case ast.Try(body=body, handlers=handlers, orelse=orelse, finalbody=finalbody):
+                self.statements(body)
+                for handler in handlers:
+                    self.statements(handler.body)
+                self.statements(orelse)
+                self.statements(finalbody)
+            case ast.With(body=body):
+                self.statements(body)
+
+    def statements(self, nodes: list):
+        for node in nodes:
+            self.statement(node)
+
+@include
+class ModuleExports(NamedTuple):
+    """What a module exports, as read from its source by `ExportIndex`.
+
+    `explicit` is whether the module sets `__all__`; if it doesn't, `names` are the public
+    names that it defines at the top level, which is what a star import would get.
+    `dynamic` is whether some of `__all__` is only known by running the module, in which
+    case `names` are only the names that could be read.
+    """
+    name: str
+    path: str
+    digest: str
+    names: Tuple[str, ...]
+    explicit: bool
+    dynamic: bool
+
+@include
+class ExportIndex:
+    """An index of what modules export, read from their source with `ast` instead of importing them.
+
+    This understands the ways `Includer` is used in this package: `__all__ = Includer(...)`
+    (with or without a walrus alias like `include`), `@include` and `@include(alias=...)`
+    decorators, and `include.include(...)`/`append`/`extend` calls, as well as plain
+    `__all__` lists.
+
+    Results are cached by the SHA-256 of the source, in memory and in the JSON file at
+    `cache_path` if one is given. A file is only read again when its modification
+    time or size changes.
+    ```python
+    index = ExportIndex()
+    index.exports('toolbox.fp').names
+    index.find('matchall', ['toolbox.fp', 'toolbox.predicate'])
+    ```
+    """
+    _VERSION = 1
+
+    def __init__(self, cache_path: str = None):
+        self.cache_path = cache_path
+        # digest -> (names, explicit, dynamic)
+        self._by_digest: Dict[str, Tuple[Tuple[str, ...], bool, bool]] = {}
+        # path -> (stat, digest)
+        self._files: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        if cache_path is not None and os.path.exists(cache_path):
+            import json
+            try:
+                with open(cache_path) as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                data = {}
+            if data.get('version') == self._VERSION:
+                for digest, (names, explicit, dynamic) in data.get('exports', {}).items():
+                    self._by_digest[digest] = (tuple(names), explicit, dynamic)
+
+    @staticmethod
+    def scan(source: str | bytes) -> Tuple[Tuple[str, ...], bool, bool]:
+        """Reads `(names, explicit, dynamic)` from a module's source (see `ModuleExports`)."""
+        import ast
+        scanner = _ExportScanner()
+        scanner.statements(ast.parse(source).body)
+        names = scanner.names if scanner.explicit else scanner.public
+        return tuple(dict.fromkeys(names)), scanner.explicit, scanner.dynamic
+
+    @staticmethod
+    def locate(module: str) -> str:
+        """The path of a module's source, found without running it (its parent packages are imported)."""
+        if (loaded := sys.modules.get(module)) is not None and getattr(loaded, '__file__', None):
+            return loaded.__file__
+        spec = importlib.util.find_spec(module)
+        if spec is None:
+            raise ModuleNotFoundError(f'No module named {module!r}', name=module)
+        if not spec.origin or not spec.origin.endswith('.py'):
+            raise ImportError(f'No Python source for {module!r}', name=module)
+        return spec.origin
+
+    def exports(self, module: str, path: str = None) -> ModuleExports:
+        """What the module named `module` exports. `path` is its source, which is found if not given."""
+        path = os.path.abspath(path or self.locate(module))
+        st = os.stat(path)
+        stat = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            known = self._files.get(path)
+            if known is not None and known[0] == stat and known[1] in self._by_digest:
+                digest = known[1]
+            else:
+                import hashlib
+                with open(path, 'rb') as file:
+                    source = file.read()
+                digest = hashlib.sha256(source).hexdigest()
+                self._files[path] = (stat, digest)
+                if digest not in self._by_digest:
+                    self._by_digest[digest] = self.scan(source)
+                    self._dirty = True
+            names, explicit, dynamic = self._by_digest[digest]
+        return ModuleExports(module, path, digest, names, explicit, dynamic)
+
+    def find(self, name: str, modules: Iterable[str]) -> str | None:
+        """The first module in `modules` that exports `name`."""
+        for module in modules:
+            if name in self.exports(module).names:
+                return module
+        return None
+
+    def save(self):
+        """Writes the cache to `cache_path`, if anything was added to it."""
+        if self.cache_path is None or not self._dirty:
+            return
+        import json
+        with self._lock:
+            data = {
+                'version': self._VERSION,
+                'exports': {digest: [list(names), explicit, dynamic] for digest, (names, explicit, dynamic) in self._by_digest.items()},
+            }
+            temporary = f'{self.cache_path}.{os.getpid()}.tmp'
+            with open(temporary, 'w') as file:
+                json.dump(data, file)
+            os.replace(temporary, self.cache_path)
+            self._dirty = False
+
+    def lazy_exports(self, namespace: dict, *modules: str):
+        """Re-exports the names that `modules` export from the module whose globals are `namespace`.
+
+        This is for star-import shims: `__all__` is filled from the index, and each
+        name is imported from its module when it's first accessed, through a module
+        `__getattr__` (PEP 562). Earlier modules win when two export the same name.
+        ```python
+        # shim.py
+        ExportIndex().lazy_exports(globals(), 'toolbox.fp', 'toolbox.container')
+        ```
+        """
+        owners = {}
+        for module in modules:
+            for name in self.exports(module).names:
+                owners.setdefault(name, module)
+        previous = namespace.get('__getattr__')
+        def __getattr__(name: str):
+            if (module := owners.get(name)) is None:
+                if previous is not None:
+                    return previous(name)
+                raise AttributeError(f'module {namespace.get("__name__")!r} has no attribute {name!r}')
+            value = getattr(importlib.import_module(module), name)
+            namespace[name] = value
+            return value
+        def __dir__():
+            return sorted({*namespace, *owners})
+        existing = namespace.get('__all__')
+        namespace['__all__'] = Includer([*(existing or ()), *(name for name in owners if name not in (existing or ()))])
+        namespace['__getattr__'] = __getattr__
+        namespace['__dir__'] = __dir__
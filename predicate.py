@@ -0,0 +1,268 @@
+"""Composable predicates that compile down to a single function.
+
+The predicate factories in `fp` each return their own `partial` or closure,
+and `fp.matchall`/`fp.matchany` call each of them in turn for every value.
+The `Predicate` type in this module describes the same checks as a tree that
+can be combined with `&`, `|` and `~`, and the whole tree is turned into one
+generated function when the predicate is constructed.
+
+```py
+from toolbox.predicate import eq, lt, present
+
+check = (lt(0) & present(allowed)) | eq(-1)
+matches = list(filter(check.function, values))
+```
+`Predicate` instances are callable, but `Predicate.function` is the generated
+function itself, so passing that along saves one more call per value.
+"""
+import operator
+from typing import *
+from functools import partial
+from . import fp
+from .modutil import Includer
+
+__all__ = (include := Includer())
+
+_comparisons = {
+    operator.eq: '==',
+    operator.ne: '!=',
+    operator.lt: '<',
+    operator.le: '<=',
+    operator.gt: '>',
+    operator.ge: '>=',
+    operator.is_: 'is',
+    operator.is_not: 'is not',
+}
+
+# Nodes are plain tuples where the first item is the kind of node:
+#   ('const', bool)
+#   ('cmp', op, operand)        ->  operand <op> value
+#   ('in', collection)          ->  value in collection
+#   ('notin', collection)       ->  value not in collection
+#   ('method', fn, args)        ->  fn(value, *args)
+#   ('instance', type)          ->  isinstance(value, type)
+#   ('type', type)              ->  type(value) == type
+#   ('call', fn)                ->  fn(value)
+#   ('not', node)
+#   ('and', (node, ...))
+#   ('or', (node, ...))
+
+def _join(kind: str, nodes: Iterable[tuple]) -> tuple:
+    """Flattens nested nodes of the same kind into a single node."""
+    flat = []
+    for node in nodes:
+        if node[0] == kind:
+            flat.extend(node[1])
+        else:
+            flat.append(node)
+    if len(flat) == 1:
+        return flat[0]
+    return (kind, tuple(flat))
+
+def _expression(node: tuple, constants: list) -> str:
+    def const(value) -> str:
+        constants.append(value)
+        return f'_c{len(constants) - 1}'
+    match node:
+        case ('const', bool(value)):
+            return repr(value)
+        case ('cmp', op, operand):
+            return f'({const(operand)} {_comparisons[op]} value)'
+        case ('in', collection):
+            return f'(value in {const(collection)})'
+        case ('notin', collection):
+            return f'(value not in {const(collection)})'
+        case ('method', fn, args):
+            return f'{const(fn)}(value, {", ".join(map(const, args))})'
+        case ('instance', cls):
+            return f'isinstance(value, {const(cls)})'
+        case ('type', cls):
+            return f'(type(value) == {const(cls)})'
+        case ('call', fn):
+            return f'{const(fn)}(value)'
+        case ('not', inner):
+            return f'(not {_expression(inner, constants)})'
+        case ('and', nodes):
+            return f'({" and ".join(_expression(inner, constants) for inner in nodes)})'
+        case ('or', nodes):
+            return f'({" or ".join(_expression(inner, constants) for inner in nodes)})'
+        case _:
+            raise ValueError(f'Invalid predicate node: {node!r}')
+
+def _compile(node: tuple) -> Callable[[Any], bool]:
+    """Generates a single function that evaluates the whole predicate tree.
+
+    Every operand is bound as a closure variable of the generated function,
+    so evaluating the predicate does no global or attribute lookups beyond
+    what the comparisons themselves need.
+    """
+    constants = []
+    expression = _expression(node, constants)
+    names = ', '.join(f'_c{i}' for i in range(len(constants)))
+    source = (
+        f'def _factory({names}):\n'
+        f'    def predicate(value):\n'
+        f'        return True if {expression} else False\n'
+        f'    return predicate\n'
+    )
+    namespace = {}
+    exec(compile(source, '<predicate>', 'exec'), namespace)
+    function = namespace['_factory'](*constants)
+    function.__doc__ = f'return {expression}'
+    return function
+
+@include
+class Predicate:
+    """A predicate tree that is compiled into a single function on construction.
+
+    Predicates can be combined with `&` (and), `|` (or) and `~` (not). The other
+    operand of `&` and `|` can be any callable that `lift` accepts.
+    """
+    __slots__ = ('node', 'function')
+    node: tuple
+    function: Callable[[Any], bool]
+
+    def __init__(self, node: tuple):
+        self.node = node
+        self.function = _compile(node)
+
+    def __call__(self, value) -> bool:
+        return self.function(value)
+
+    def __and__(self, other) -> 'Predicate':
+        return Predicate(_join('and', (self.node, lift(other).node)))
+
+    def __rand__(self, other) -> 'Predicate':
+        return Predicate(_join('and', (lift(other).node, self.node)))
+
+    def __or__(self, other) -> 'Predicate':
+        return Predicate(_join('or', (self.node, lift(other).node)))
+
+    def __ror__(self, other) -> 'Predicate':
+        return Predicate(_join('or', (lift(other).node, self.node)))
+
+    def __invert__(self) -> 'Predicate':
+        match self.node:
+            case ('not', inner):
+                return Predicate(inner)
+            case node:
+                return Predicate(('not', node))
+
+    def __repr__(self) -> str:
+        return f'Predicate({self.function.__doc__[len("return "):]})'
+
+@include
+def lift(predicate: Callable[[Any], bool]) -> Predicate:
+    """Turns a predicate from `fp` (or any other single argument callable) into a `Predicate`.
+
+    The comparison factories (`fp.eq`, `fp.lt`, ...), `fp.present`, `fp.absent`,
+    `fp.is_none` and `fp.not_none` are recognized and inlined into the generated
+    function. Anything else is called as-is.
+
+    `fp.present` and `fp.absent` are inlined as a check against their index, so unlike
+    calling them directly, an unhashable value raises a `TypeError` when the index is a set.
+    """
+    if isinstance(predicate, Predicate):
+        return predicate
+    if (
+        isinstance(predicate, partial)
+        and predicate.func in _comparisons
+        and len(predicate.args) == 1
+        and not predicate.keywords
+    ):
+        return Predicate(('cmp', predicate.func, predicate.args[0]))
+    if isinstance(predicate, fp.present):
+        return Predicate(('in', predicate.index))
+    if isinstance(predicate, fp.absent):
+        return Predicate(('notin', predicate.index))
+    if predicate is fp.is_none:
+        return Predicate(('cmp', operator.is_, None))
+    if predicate is fp.not_none:
+        return Predicate(('cmp', operator.is_not, None))
+    if callable(predicate):
+        return Predicate(('call', predicate))
+    raise TypeError(f'Expected a callable predicate, got {type(predicate)}')
+
+@include
+def matchall(*predicates) -> Predicate:
+    """Compiled counterpart of `fp.matchall` for single argument predicates."""
+    if not predicates:
+        return Predicate(('const', True))
+    return Predicate(_join('and', (lift(predicate).node for predicate in predicates)))
+
+@include
+def matchany(*predicates) -> Predicate:
+    """Compiled counterpart of `fp.matchany` for single argument predicates."""
+    if not predicates:
+        return Predicate(('const', False))
+    return Predicate(_join('or', (lift(predicate).node for predicate in predicates)))
+
+@include
+def ne(value) -> Predicate:
+    """Creates a predicate that checks if value is not equal to parameter."""
+    return lift(fp.ne(value))
+
+@include
+def eq(value) -> Predicate:
+    """Creates a predicate that checks if value is equal to parameter."""
+    return lift(fp.eq(value))
+
+@include
+def lt(value) -> Predicate:
+    """Creates a predicate that checks if value is less than parameter."""
+    return lift(fp.lt(value))
+
+@include
+def le(value) -> Predicate:
+    """Creates a predicate that checks if value is less than or equal to parameter."""
+    return lift(fp.le(value))
+
+@include
+def gt(value) -> Predicate:
+    """Creates a predicate that checks if value is greater than parameter."""
+    return lift(fp.gt(value))
+
+@include
+def ge(value) -> Predicate:
+    """Creates a predicate that checks if value is greater than or equal to parameter."""
+    return lift(fp.ge(value))
+
+@include
+def is_(value) -> Predicate:
+    """Creates a predicate that checks if value is parameter."""
+    return lift(fp.is_(value))
+
+@include
+def is_not(value) -> Predicate:
+    """Creates a predicate that checks if value is not parameter."""
+    return lift(fp.is_not(value))
+
+@include
+def present(collection: Container) -> Predicate:
+    """Creates a predicate that checks if a value is present in collection."""
+    return lift(fp.present(collection))
+
+@include
+def absent(collection: Container) -> Predicate:
+    """Creates a predicate that checks if a value is absent from collection."""
+    return lift(fp.absent(collection))
+
+@include
+def startswith(start: str, __start: SupportsIndex = None, __end: SupportsIndex = None) -> Predicate:
+    return Predicate(('method', str.startswith, (start, __start, __end)))
+
+@include
+def endswith(end: str, __start: SupportsIndex = None, __end: SupportsIndex = None) -> Predicate:
+    return Predicate(('method', str.endswith, (end, __start, __end)))
+
+@include
+def istype(type: Type) -> Predicate:
+    return Predicate(('type', type))
+
+@include
+def instanceof(type: Type) -> Predicate:
+    return Predicate(('instance', type))
+
+not_none = lift(fp.not_none)
+is_none = lift(fp.is_none)
+include.include('not_none', 'is_none')
@@ -0,0 +1,318 @@
+"""Low-overhead call profiling.
+
+`@profiled` keeps a call count, the total time and a latency histogram for each
+decorated function, without the cost of a tracing profiler like `cProfile`. Every
+profiled function is kept in a global registry, which can be dumped as a report:
+```py
+from toolbox.profiling import profiled, report
+
+@profiled
+def handle(request):...
+
+print(report())
+```
+Profiling can be turned off at runtime with `disable()`, after which a profiled call
+only costs one extra function call and a flag check.
+"""
+import functools
+import inspect
+import json
+import threading
+import time
+import tracemalloc
+from typing import *
+from .decorators import decorator
+from .modutil import Includer
+
+__all__ = (include := Includer())
+
+_enabled = True
+# One bucket per power of two nanoseconds; bucket `b` holds durations in [2**(b-1), 2**b).
+_BUCKETS = 64
+
+@include
+def enable():
+    """Turns profiling on for every profiled function."""
+    global _enabled
+    _enabled = True
+
+@include
+def disable():
+    """Turns profiling off. Profiled functions call straight through to the target."""
+    global _enabled
+    _enabled = False
+
+@include
+def enabled() -> bool:
+    return _enabled
+
+class _Counters:
+    """The counters for one function in one thread. Only that thread writes to them."""
+    __slots__ = ('calls', 'errors', 'total', 'max', 'histogram', 'countdown', 'sampled', 'allocated', 'peak')
+
+    def __init__(self, trace_memory: int):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0
+        self.max = 0
+        self.histogram = [0] * _BUCKETS
+        self.countdown = trace_memory
+        self.sampled = 0
+        self.allocated = 0
+        self.peak = 0
+
+@include
+class Profile:
+    """The collected statistics for one profiled function.
+
+    Each thread records into its own counters, so the hot path takes no locks. The
+    counters are merged when `stats()` is called, so a snapshot taken while other
+    threads are running can be off by the calls that are in flight.
+    """
+    __slots__ = ('name', 'trace_memory', '_local', '_threads', '_lock')
+
+    def __init__(self, name: str, trace_memory: int = 0):
+        self.name = name
+        self.trace_memory = trace_memory
+        self._local = threading.local()
+        self._threads: List[_Counters] = []
+        self._lock = threading.Lock()
+
+    def counters(self) -> _Counters:
+        """The counters for the current thread."""
+        try:
+            return self._local.counters
+        except AttributeError:
+            counters = self._local.counters = _Counters(self.trace_memory)
+            with self._lock:
+                self._threads.append(counters)
+            return counters
+
+    def reset(self):
+        with self._lock:
+            for counters in self._threads:
+                counters.__init__(self.trace_memory)
+
+    def stats(self) -> dict:
+        calls = errors = total = longest = sampled = allocated = peak = 0
+        histogram = [0] * _BUCKETS
+        with self._lock:
+            threads = list(self._threads)
+        for counters in threads:
+            calls += counters.calls
+            errors += counters.errors
+            total += counters.total
+            longest = max(longest, counters.max)
+            sampled += counters.sampled
+            allocated += counters.allocated
+            peak = max(peak, counters.peak)
+            for bucket, n in enumerate(counters.histogram):
+                histogram[bucket] += n
+        stats = {
+            'name': self.name,
+            'calls': calls,
+            'errors': errors,
+            'total_ns': total,
+            'mean_ns': total / calls if calls else 0.0,
+            'max_ns': longest,
+            'p50_ns': _percentile(histogram, calls, 0.50, longest),
+            'p90_ns': _percentile(histogram, calls, 0.90, longest),
+            'p99_ns': _percentile(histogram, calls, 0.99, longest),
+            # Upper bound of each non-empty bucket in nanoseconds -> count.
+            'histogram': {1 << bucket: n for bucket, n in enumerate(histogram) if n},
+        }
+        if self.trace_memory:
+            stats['memory'] = {
+                'sampled': sampled,
+                'allocated_bytes': allocated,
+                'mean_allocated_bytes': allocated / sampled if sampled else 0.0,
+                'peak_bytes': peak,
+            }
+        return stats
+
+    def __repr__(self) -> str:
+        return f'Profile({self.name!r})'
+
+def _percentile(histogram: List[int], calls: int, fraction: float, longest: int) -> int:
+    """The upper bound of the bucket that the percentile falls into, capped at the longest call."""
+    if not calls:
+        return 0
+    rank = fraction * calls
+    seen = 0
+    for bucket, n in enumerate(histogram):
+        seen += n
+        if seen >= rank:
+            return min(1 << bucket, longest)
+    return longest
+
+registry: Dict[str, Profile] = {}
+_registry_lock = threading.Lock()
+
+@include
+def profile(name: str, trace_memory: int = 0) -> Profile:
+    """Gets the `Profile` registered under `name`, creating it if needed."""
+    with _registry_lock:
+        if (existing := registry.get(name)) is None:
+            existing = registry[name] = Profile(name, trace_memory)
+        return existing
+
+def _record(counters: _Counters, elapsed: int):
+    counters.calls += 1
+    counters.total += elapsed
+    if elapsed > counters.max:
+        counters.max = elapsed
+    counters.histogram[min(elapsed.bit_length(), _BUCKETS - 1)] += 1
+
+_tracing = 0
+_tracing_lock = threading.Lock()
+
+def _traced(counters: _Counters, trace_memory: int, target: Callable, args: tuple, kwargs: dict):
+    """Calls `target` while measuring what it allocates.
+
+    If nothing else is tracing, `tracemalloc` is started just for the call and stopped
+    afterwards, since leaving it running slows down the whole process.
+    """
+    global _tracing
+    counters.countdown = trace_memory
+    with _tracing_lock:
+        if not _tracing and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing = 1
+        elif _tracing:
+            _tracing += 1
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    try:
+        return target(*args, **kwargs)
+    finally:
+        after, peak = tracemalloc.get_traced_memory()
+        counters.sampled += 1
+        counters.allocated += after - before
+        counters.peak = max(counters.peak, peak - before)
+        with _tracing_lock:
+            if _tracing:
+                _tracing -= 1
+                if not _tracing:
+                    tracemalloc.stop()
+
+@decorator(bare=True)
+@include
+def profiled(target, name: str = None, trace_memory: int = 0):
+    """Records the calls to the decorated function in the global registry.
+
+    `name` defaults to the module and qualified name of the function. Functions
+    profiled under the same name share a `Profile`.
+
+    With `trace_memory=n`, one call in every `n` (per thread) is run with `tracemalloc`
+    tracing, which records the bytes that the call allocated and kept, and the peak
+    during the call. If `tracemalloc` isn't already running, it only runs during the
+    sampled call. The peak is shared by the whole process, so nested or concurrent
+    sampled calls see each other's allocations. Coroutine functions are timed from
+    start to finish, but their memory is not traced.
+
+    The decorated function gets a `profile` attribute with its `Profile`.
+    ```py
+    @profiled(trace_memory=100)
+    def parse(text: str):...
+    ```
+    """
+    if name is None:
+        name = f'{target.__module__}.{target.__qualname__}'
+    stats = profile(name, trace_memory)
+    counters = stats.counters
+    clock = time.perf_counter_ns
+    if inspect.iscoroutinefunction(target):
+        @functools.wraps(target)
+        async def profiled_call(*args, **kwargs):
+            if not _enabled:
+                return await target(*args, **kwargs)
+            current = counters()
+            start = clock()
+            try:
+                return await target(*args, **kwargs)
+            except BaseException:
+                current.errors += 1
+                raise
+            finally:
+                _record(current, clock() - start)
+    elif trace_memory:
+        @functools.wraps(target)
+        def profiled_call(*args, **kwargs):
+            if not _enabled:
+                return target(*args, **kwargs)
+            current = counters()
+            start = clock()
+            try:
+                current.countdown -= 1
+                if current.countdown <= 0:
+                    return _traced(current, trace_memory, target, args, kwargs)
+                return target(*args, **kwargs)
+            except BaseException:
+                current.errors += 1
+                raise
+            finally:
+                _record(current, clock() - start)
+    else:
+        @functools.wraps(target)
+        def profiled_call(*args, **kwargs):
+            if not _enabled:
+                return target(*args, **kwargs)
+            current = counters()
+            start = clock()
+            try:
+                return target(*args, **kwargs)
+            except BaseException:
+                current.errors += 1
+                raise
+            finally:
+                _record(current, clock() - start)
+    profiled_call.profile = stats
+    return profiled_call
+
+@include
+def snapshot() -> dict:
+    """The statistics of every registered function, keyed by name."""
+    with _registry_lock:
+        profiles = list(registry.values())
+    return {stats.name: stats.stats() for stats in profiles}
+
+@include
+def reset():
+    """Clears the counters of every registered function."""
+    with _registry_lock:
+        profiles = list(registry.values())
+    for stats in profiles:
+        stats.reset()
+
+@include
+def report(sort: Literal['total', 'calls', 'mean', 'max', 'p99', 'name'] = 'total', limit: int = None) -> str:
+    """Formats the registry as a table, sorted by `sort` (descending, except by name)."""
+    rows = list(snapshot().values())
+    if sort == 'name':
+        rows.sort(key=lambda row: row['name'])
+    else:
+        rows.sort(key=lambda row: row[f'{sort}_ns' if sort != 'calls' else 'calls'], reverse=True)
+    rows = rows[:limit]
+    width = max((len(row['name']) for row in rows), default=4)
+    lines = [
+        f'{"name":<{width}} {"calls":>10} {"errors":>7} {"total ms":>11} '
+        f'{"mean us":>10} {"p50 us":>10} {"p99 us":>10} {"max us":>10} {"alloc B/call":>13}'
+    ]
+    for row in rows:
+        memory = row.get('memory')
+        alloc = f'{memory["mean_allocated_bytes"]:13.0f}' if memory and memory['sampled'] else f'{"-":>13}'
+        lines.append(
+            f'{row["name"]:<{width}} {row["calls"]:>10} {row["errors"]:>7} {row["total_ns"] / 1e6:11.3f} '
+            f'{row["mean_ns"] / 1e3:10.3f} {row["p50_ns"] / 1e3:10.3f} {row["p99_ns"] / 1e3:10.3f} '
+            f'{row["max_ns"] / 1e3:10.3f} {alloc}'
+        )
+    return '\n'.join(lines)
+
+@include
+def dump(path: str = None, indent: int = 2) -> str:
+    """Returns the snapshot as JSON, and writes it to `path` if given."""
+    text = json.dumps({'time': time.time(), 'enabled': _enabled, 'functions': snapshot()}, indent=indent)
+    if path is not None:
+        with open(path, 'w') as file:
+            file.write(text)
+    return text
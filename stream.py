@@ -0,0 +1,216 @@
+"""Lazy, fused pipelines over the helpers in `fp`.
+
+Chaining `filter`, `map`, `fp.filternone` and friends stacks one generator per stage,
+and every element pays for resuming each of them. A `Stream` only records the stages,
+and when it's iterated, the stages are generated into a single loop.
+
+```py
+from toolbox.stream import Stream
+
+count = Stream(records).filternone().filter(is_valid).map(normalize).take(1000).count()
+```
+"""
+import itertools
+import operator
+from typing import *
+from . import fp
+from .modutil import Includer
+
+__all__ = (include := Includer())
+
+def _chunks(source: Iterable, size: int | None) -> Iterator[list]:
+    """Yields lists of `size` elements from `source`, or one list of all of them if `size` is None."""
+    if size is None:
+        return iter([everything] if (everything := list(source)) else [])
+    it = iter(source)
+    return iter(lambda: list(itertools.islice(it, size)), [])
+
+def _compile(stages: tuple, batchsize: int | None) -> Callable[[Iterable], Iterator]:
+    """Generates a generator function that runs all of the stages in one loop.
+
+    Per-element stages are fused into one loop body. When the stream is batched
+    (or has a `map_batches` stage), elements are pulled in lists (all at once if it
+    isn't batched), and each run of per-element stages between `map_batches` stages
+    is fused into an inner loop over the current list.
+    """
+    constants = []
+    def const(value) -> str:
+        constants.append(value)
+        return f'_c{len(constants) - 1}'
+    segments = [[]]
+    batchfns = []
+    for stage in stages:
+        if stage[0] == 'map_batches':
+            batchfns.append(stage[1])
+            segments.append([])
+        else:
+            segments[-1].append(stage)
+    batched = batchsize is not None or bool(batchfns)
+    init = []
+    # Lines for each segment's loop body, and whether the segment has a `take`.
+    bodies = []
+    for index, segment in enumerate(segments):
+        final = index == len(segments) - 1
+        stop = 'return' if final else 'break'
+        body = []
+        taking = False
+        def skip() -> list:
+            return [f'    if _stop{index}: {stop}', '    continue'] if taking else ['    continue']
+        for number, stage in enumerate(segment):
+            name = f'{index}_{number}'
+            match stage:
+                case ('filter', None):
+                    body += ['if not value:', *skip()]
+                case ('filter', predicate):
+                    body += [f'if not {const(predicate)}(value):', *skip()]
+                case ('filterfalse',):
+                    body += ['if not value:', *skip()]
+                case ('filternone',):
+                    body += ['if value is None:', *skip()]
+                case ('filtertype', cls):
+                    body += [f'if not isinstance(value, {const(cls)}):', *skip()]
+                case ('map', fn):
+                    body += [f'value = {const(fn)}(value)']
+                case ('yieldinstead', value):
+                    body += [f'value = {const(value)}']
+                case ('skip', n):
+                    init += [f'_skip{name} = {n}']
+                    body += [f'if _skip{name} > 0:', f'    _skip{name} -= 1', *skip()]
+                case ('take', n):
+                    if n <= 0:
+                        # Nothing gets past this stage.
+                        init += ['return']
+                    if not taking:
+                        init += [f'_stop{index} = False']
+                    taking = True
+                    init += [f'_left{name} = {n}']
+                    body += [f'_left{name} -= 1', f'if _left{name} <= 0:', f'    _stop{index} = True']
+                case _:
+                    raise ValueError(f'Invalid stage: {stage!r}')
+        if final:
+            body += ['yield value']
+        else:
+            body += ['_buffer.append(value)']
+        if taking:
+            body += [f'if _stop{index}: {stop}']
+        bodies.append((body, taking))
+    lines = list(init)
+    if not batched:
+        lines += ['for value in source:', *('    ' + line for line in bodies[0][0])]
+    else:
+        lines += [f'for chunk in _chunks(source, {batchsize!r}):']
+        for index, (body, _) in enumerate(bodies):
+            if index < len(bodies) - 1:
+                lines += ['    _buffer = []', '    for value in chunk:', *('        ' + line for line in body)]
+                lines += [f'    chunk = {const(batchfns[index])}(_buffer)']
+            else:
+                lines += ['    for value in chunk:', *('        ' + line for line in body)]
+        stops = [f'_stop{index}' for index, (_, taking) in enumerate(bodies[:-1]) if taking]
+        if stops:
+            lines += [f'    if {" or ".join(stops)}: return']
+    names = ', '.join(f'_c{i}' for i in range(len(constants)))
+    source = (
+        f'def _factory(_chunks, {names}):\n'
+        f'    def stream(source):\n'
+        + ''.join(f'        {line}\n' for line in lines) +
+        '        return\n'
+        f'        yield\n'
+        f'    return stream\n'
+    )
+    namespace = {}
+    exec(compile(source, '<stream>', 'exec'), namespace)
+    return namespace['_factory'](_chunks, *constants)
+
+@include
+class Stream:
+    """A lazy pipeline over an iterable.
+
+    Each operation returns a new `Stream` with the stage added, and nothing runs until
+    the stream is iterated or a terminal operation (`count`, `first`, `last`, `list`)
+    is called. Adjacent stages are fused into a single loop when the stream runs.
+
+    `batched(n)` pulls elements from the source `n` at a time. Stages added with
+    `map_batches` are handed the whole list of elements that reached them and return a
+    new list, which is useful for functions that are faster on many elements at once.
+    Without `batched`, a stream with a `map_batches` stage reads the whole source into
+    one list first, so use `batched` for sources that are large or endless.
+    """
+    __slots__ = ('source', 'stages', 'batchsize', '_run')
+
+    def __init__(self, source: Iterable, stages: tuple = (), batchsize: int | None = None):
+        self.source = source
+        self.stages = stages
+        self.batchsize = batchsize
+        self._run = None
+
+    def _then(self, *stage) -> 'Stream':
+        return Stream(self.source, (*self.stages, stage), self.batchsize)
+
+    def filter(self, predicate: Callable[[Any], Any] | None = None) -> 'Stream':
+        """Keeps the elements that `predicate` is true for (or that are true themselves if it's `None`)."""
+        return self._then('filter', predicate)
+
+    def filterfalse(self) -> 'Stream':
+        """Same as `fp.filterfalse`: removes all elements that evaluate to False."""
+        return self._then('filterfalse')
+
+    def filternone(self) -> 'Stream':
+        """Same as `fp.filternone`: removes the elements that are None."""
+        return self._then('filternone')
+
+    def filtertype(self, _type: Type) -> 'Stream':
+        """Same as `fp.filtertype`: keeps the elements that are instances of `_type`."""
+        return self._then('filtertype', _type)
+
+    def map(self, fn: Callable[[Any], Any]) -> 'Stream':
+        return self._then('map', fn)
+
+    def yieldinstead(self, value: Any = None) -> 'Stream':
+        """Same as `fp.yieldinstead`: replaces every element with `value`."""
+        return self._then('yieldinstead', value)
+
+    def skip(self, n: int) -> 'Stream':
+        """Drops the first `n` elements that reach this stage."""
+        return self._then('skip', operator.index(n))
+
+    def take(self, n: int) -> 'Stream':
+        """Stops the stream after `n` elements have reached this stage."""
+        return self._then('take', operator.index(n))
+
+    def map_batches(self, fn: Callable[[list], Iterable]) -> 'Stream':
+        """Hands `fn` a list of the elements that reached this stage, and continues with what it returns.
+
+        The list holds a batch of elements if the stream is `batched`, and all of them otherwise.
+        """
+        return self._then('map_batches', fn)
+
+    def batched(self, n: int) -> 'Stream':
+        """Pulls elements from the source `n` at a time."""
+        if n < 1:
+            raise ValueError(f'Batch size must be at least 1: {n}')
+        return Stream(self.source, self.stages, n)
+
+    def __iter__(self) -> Iterator:
+        if self._run is None:
+            self._run = _compile(self.stages, self.batchsize)
+        return self._run(self.source)
+
+    def count(self, filter: Callable[[Any], Any] = None) -> int:
+        return fp.count(iter(self), filter)
+
+    def first(self, filter: Callable[[Any], Any] = None) -> Any | None:
+        return fp.first(iter(self), filter)
+
+    def last(self) -> Any | None:
+        """The last element, or None if the stream is empty."""
+        result = None
+        for result in self:...
+        return result
+
+    def list(self) -> list:
+        return list(iter(self))
+
+    def __repr__(self) -> str:
+        stages = ''.join(f'.{stage[0]}(...)' for stage in self.stages)
+        batched = f'.batched({self.batchsize})' if self.batchsize is not None else ''
+        return f'Stream(...){batched}{stages}'
@@ -0,0 +1,15 @@
+import asyncio
+import pytest
+from .. import asyncfp, fp
+from ..container import LazySeq
+
+async def agen(n):
+    for i in range(n):
+        yield i
+
+@pytest.mark.parametrize('n', [0, 3, 9, 10, -1, -3, -10, -11])
+def test_nth_matches_fp(n):
+    expected = fp.nth(n, LazySeq(iter(range(10))))
+    assert expected == fp.nth(n, list(range(10)))
+    assert asyncio.run(asyncfp.nth(n, agen(10))) == expected
+    assert asyncio.run(asyncfp.nth(n, range(10))) == expected
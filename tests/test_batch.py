@@ -0,0 +1,64 @@
+import array
+import pytest
+from .. import fp
+
+numpy = pytest.importorskip('numpy')
+
+ARRAYS = [
+    numpy.array([1, 2, 3, 4, 5]),
+    numpy.array([0.5, 2.0, -1.0]),
+    numpy.array(['a', 'bc', 'd']),
+    numpy.array([1, None, 'a', (1, 2)], dtype=object),
+    numpy.arange(12).reshape(3, 4),
+    numpy.array([], dtype=int),
+]
+
+PREDICATES = [
+    fp.eq(2), fp.ne(2), fp.lt(3), fp.le(3), fp.gt(3), fp.ge(3),
+    fp.is_none, fp.not_none,
+    fp.present({1, 3, 'a'}), fp.absent({1, 3, 'a'}),
+    fp.present((1, 2, 3, 4, 5, 6, 7, 8, 9)), fp.present([2.0, 4]),
+    fp.present({(1, 2), (3, 4)}), fp.absent({(1, 2), (3, 4)}),
+    fp.present('abcd'), fp.present(range(3)), fp.present({'a': 1, 'd': 2}),
+    fp.present(list(range(100)), mode='bloom'), fp.present(list(range(100)), mode='compact'),
+]
+
+def scalar(predicate, values):
+    results = []
+    for value in values.flat:
+        try:
+            results.append(bool(predicate(value)))
+        except TypeError:
+            results.append(None)
+    return results
+
+@pytest.mark.parametrize('values', ARRAYS, ids=lambda values: str(values.dtype))
+@pytest.mark.parametrize('predicate', PREDICATES, ids=repr)
+def test_batch_matches_scalar(predicate, values):
+    expected = scalar(predicate, values)
+    if None in expected:
+        # The scalar predicate can't compare these values, so there's nothing to match.
+        return
+    try:
+        mask = predicate.batch(values)
+    except TypeError:
+        return
+    assert mask.shape == values.shape
+    assert mask.ravel().tolist() == expected
+
+def test_count_of_tuples_in_array():
+    values = numpy.array([1, 2, 3])
+    assert fp.count(values, fp.present({(1, 2), (3, 4)})) == 0
+    assert fp.count(values, fp.absent({(1, 2), (3, 4)})) == 3
+
+def test_array_module_arrays():
+    values = array.array('i', [1, 2, 3, 4])
+    for predicate in (fp.gt(2), fp.ge(3), fp.eq(4), fp.present({1, 4})):
+        assert fp.count(values, predicate) == sum(map(predicate, values))
+        assert fp.first(values, predicate) == next(filter(predicate, values), None)
+
+def test_compact_hashes_match_without_numpy():
+    from ..container import _mix64, _sorted_hashes
+    items = [*range(-5, 1000), 2**70, 'a', 'a', None, (1, 2), 1.5]
+    assert list(_sorted_hashes(items)) == sorted(set(map(_mix64, items)))
+    assert list(_sorted_hashes([])) == []
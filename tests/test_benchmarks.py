@@ -0,0 +1,18 @@
+import json
+from ..benchmarks import suite
+
+def test_every_case_runs(tmp_path):
+    results = suite.run(repeats=2, min_time=0, warmup=0, log=None)
+    assert len(results['results']) == sum(len(sizes) for _, sizes in suite.cases.values())
+    path = tmp_path / 'baseline.json'
+    path.write_text(json.dumps(results))
+    assert suite.main(['-k', '^callstack', '--repeats', '2', '--min-time', '0', '--warmup', '0', '--baseline', str(path), '--threshold', '1e9']) == 0
+
+def test_compare_flags_significant_slowdowns():
+    baseline = {'results': {'case[1]': {'median': 1.0, 'samples': [1.0 + i / 100 for i in range(20)]}}}
+    slower = {'results': {'case[1]': {'median': 2.0, 'samples': [2.0 + i / 100 for i in range(20)]}}}
+    [row] = suite.compare(slower, baseline)
+    assert row['regression'] and row['p'] < 0.01
+    [row] = suite.compare(baseline, baseline)
+    assert not row['regression'] and not row['improvement']
+    assert suite.mannwhitney([1.0] * 5, [1.0] * 5) == 1.0
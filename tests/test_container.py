@@ -0,0 +1,107 @@
+import array
+import itertools
+import time
+import pytest
+from ..container import BloomFilter, BoundedCache, CompactHashSet, LazySeq
+
+def test_lazyseq_matches_list():
+    values = list(range(23))
+    for chunksize in (1, 4, 23, 100):
+        seq = LazySeq(iter(values), chunksize=chunksize)
+        assert seq[5] == 5
+        assert seq.seen == min(23, -(-6 // chunksize) * chunksize)
+        for key in (slice(2, 9), slice(None, 5), slice(3, None), slice(-4, None), slice(1, 20, 3), slice(None, None, -2), slice(30, 40)):
+            assert seq[key] == values[key]
+        assert [seq[i] for i in range(-23, 23)] == values[-23:] + values
+        assert list(seq) == values
+        assert seq.length() == 23 and seq.exhausted
+        with pytest.raises(IndexError):
+            seq[23]
+        with pytest.raises(IndexError):
+            seq[-24]
+        assert seq.get(30, 'default') == 'default'
+
+def test_lazyseq_pulls_only_what_it_needs():
+    seq = LazySeq(itertools.count(), chunksize=10)
+    assert seq[25] == 25
+    assert seq.seen == 30
+    assert seq[3:7] == [3, 4, 5, 6]
+    assert seq.seen == 30
+
+def test_lazyseq_typecode():
+    seq = LazySeq(iter(range(10)), chunksize=4, typecode='i')
+    assert isinstance(seq._chunk(0), array.array)
+    assert seq[2:6] == [2, 3, 4, 5]
+
+def test_lazyseq_maxchunks_drops_or_spills():
+    dropped = LazySeq(iter(range(100)), chunksize=10, maxchunks=2)
+    assert dropped[95] == 95
+    with pytest.raises(IndexError):
+        dropped[3]
+    spilled = LazySeq(iter(range(100)), chunksize=10, maxchunks=2, spill=True)
+    assert spilled[95] == 95
+    assert spilled[3] == 3
+    assert list(spilled) == list(range(100))
+
+@pytest.mark.parametrize('options', [{'chunksize': 0}, {'maxchunks': 0}])
+def test_lazyseq_rejects_bad_options(options):
+    with pytest.raises(ValueError):
+        LazySeq([], **options)
+
+def test_bounded_cache_lru():
+    cache = BoundedCache('lru', maxsize=2)
+    cache['a'] = 1
+    cache['b'] = 2
+    assert cache['a'] == 1
+    cache['c'] = 3
+    assert 'b' not in cache._entries and cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.evictions == 1
+    with pytest.raises(KeyError):
+        cache['b']
+
+def test_bounded_cache_lfu():
+    cache = BoundedCache('lfu', maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.get('a')
+    cache.get('b')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+def test_bounded_cache_ttl_and_maxbytes():
+    cache = BoundedCache('ttl', maxsize=None, ttl=0.05)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    time.sleep(0.06)
+    assert cache.get('a') is None
+    assert cache.expirations == 1
+    sized = BoundedCache('lru', maxsize=None, maxbytes=10, sizeof=len)
+    sized.set('a', 'x' * 6)
+    sized.set('b', 'x' * 6)
+    assert len(sized) == 1 and sized.get('b') == 'x' * 6
+    sized.set('c', 'x' * 11)
+    assert sized.get('c') is None and sized.bytes == 6
+    with pytest.raises(ValueError):
+        BoundedCache('fifo')
+    with pytest.raises(ValueError):
+        BoundedCache('ttl')
+
+def test_bloom_filter_has_no_false_negatives():
+    items = [f'item{i}' for i in range(2000)]
+    bloom = BloomFilter(items, error_rate=0.01)
+    assert all(item in bloom for item in items)
+    false_positives = sum(f'other{i}' in bloom for i in range(2000))
+    assert false_positives < 2000 * 0.03
+    assert bloom.stats()['entries'] == 2000
+    with pytest.raises(ValueError):
+        BloomFilter(error_rate=1)
+
+def test_compact_hash_set_has_no_false_negatives():
+    items = [f'item{i}' for i in range(2000)]
+    compact = CompactHashSet(items)
+    assert all(item in compact for item in items)
+    assert not any(f'other{i}' in compact for i in range(2000))
+    assert compact.stats()['entries'] == 2000
@@ -0,0 +1,259 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from ..decorators import Alias, decorator, diskcache, hooks, lazy_evaluate, lazy_timings, lookup, memoize, multiton, params, pooled, wrap
+
+def test_wrap_gives_hooks_only_the_passed_arguments():
+    seen = []
+    def target(a, b=1, /, c=2, *args, d, e=5, **kwargs):
+        return (a, b, c, args, d, e, kwargs)
+    def before(*args, **kwargs):
+        seen.append((args, kwargs))
+    wrapper = wrap(target, hooks(before=before))
+    assert wrapper(0, d=4) == target(0, d=4)
+    assert wrapper(0, 1, 2, 3, d=4, z=9) == target(0, 1, 2, 3, d=4, z=9)
+    assert wrapper(0, c=7, d=1) == target(0, c=7, d=1)
+    assert seen == [((0,), {'d': 4}), ((0, 1, 2, 3), {'d': 4, 'z': 9}), ((0,), {'c': 7, 'd': 1})]
+
+def test_wrap_guard_with_defaulted_parameter():
+    def target(x, y=2):
+        return x + y
+    wrapper = wrap(target, hooks(guard=lambda x: x > 0, default='no'))
+    assert wrapper(3) == 5
+    assert wrapper(-1) == 'no'
+
+def test_stacked_hooks_collapse_into_one_frame():
+    calls = []
+    depth = []
+    @decorator
+    def traced(target, label):
+        return hooks(before=lambda *args, **kwargs: calls.append(label))
+    def target(x):
+        # The caller, then the one generated wrapper.
+        depth.append(sys._getframe(2).f_code.co_name)
+        return x
+    outer = traced('outer')(traced('middle')(traced('inner')(target)))
+    assert outer.__hooks__[1] is target
+    assert run(outer) == 1
+    assert depth == ['run']
+    assert calls == ['outer', 'middle', 'inner']
+
+def run(fn):
+    return fn(1)
+
+def test_lookup_caches_values_and_misses():
+    calls = []
+    def getter(key):
+        calls.append(key)
+        return key * 2 if key < 3 else None
+    table = lookup(getter, cache=True, negative=True)
+    assert [table[1], table[1], table[5], table[5]] == [2, 2, None, None]
+    assert calls == [1, 5]
+    table.invalidate(1)
+    assert table[1] == 2
+    assert calls == [1, 5, 1]
+
+def test_lookup_does_not_cache_errors():
+    failures = [TimeoutError()]
+    def getter(key):
+        if failures:
+            raise failures.pop()
+        return key
+    table = lookup(getter, cache=True, negative=True)
+    with pytest.raises(TimeoutError):
+        table['a']
+    assert table['a'] == 'a'
+
+def test_lookup_get_many_falls_back_when_batch_fails():
+    calls = []
+    def getter(key):
+        calls.append(key)
+        return key if key < 3 else None
+    def batch(keys):
+        raise ConnectionError
+    table = lookup(getter, cache=True, negative=True, batch=batch)
+    assert table.get_many([1, 2, 5, 1]) == {1: 1, 2: 2, 5: None}
+    assert table.get_many([1, 5]) == {1: 1, 5: None}
+    assert calls == [1, 2, 5]
+
+def test_diskcache_hits_across_calls(tmp_path):
+    calls = []
+    @diskcache(path=tmp_path / 'cache.sqlite3')
+    def square(x, options=None):
+        calls.append(x)
+        return x * x
+    assert [square(3), square(3), square(3, options={'b': 1, 'a': 2})] == [9, 9, 9]
+    assert calls == [3, 3]
+    square.invalidate(3)
+    assert square(3) == 9
+    assert calls == [3, 3, 3]
+
+def test_diskcache_calls_through_for_unpicklable_arguments(tmp_path):
+    @diskcache(path=tmp_path / 'cache.sqlite3')
+    def locked(lock):
+        return lock.locked()
+    assert locked(threading.Lock()) is False
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='needs POSIX permissions')
+def test_diskcache_refuses_a_shared_directory(tmp_path):
+    tmp_path.chmod(0o777)
+    @diskcache(path=tmp_path / 'cache.sqlite3')
+    def identity(x):
+        return x
+    with pytest.raises(PermissionError):
+        identity(1)
+
+def test_diskcache_codehash_is_stable_without_source():
+    # The repr of a lock holds its address.
+    script = 'import threading; from {0}.decorators import _codehash; print(_codehash(threading.Lock()))'.format(
+        __package__.rpartition('.')[0]
+    )
+    hashes = {
+        subprocess.run(
+            [sys.executable, '-c', script], check=True, capture_output=True, text=True,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        ).stdout
+        for _ in range(2)
+    }
+    assert len(hashes) == 1
+
+def test_decorators_import_leaves_out_the_cache_modules():
+    script = (
+        'import sys; import {0}.decorators; '
+        'print([m for m in ("sqlite3", "hashlib") if m in sys.modules])'
+    ).format(__package__.rpartition('.')[0])
+    output = subprocess.run(
+        [sys.executable, '-c', script], check=True, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+    ).stdout
+    assert output.strip() == '[]'
+
+def test_pooled_fills_in_defaults():
+    @pooled
+    class Connection:
+        def __init__(self, host, port=5432):
+            self.host = host
+            self.port = port
+    assert Connection('db') is Connection('db', 5432) is Connection(host='db', port=5432)
+    assert Connection('db') is not Connection('db', 1)
+    assert Connection.pool.stats()['created'] == 2
+    Connection.pool.discard(host='db')
+    assert len(Connection.pool) == 1
+
+def test_pooled_unhashable_arguments_are_not_pooled():
+    @multiton(maxsize=4)
+    class Query:
+        def __init__(self, table, columns=[]):
+            self.columns = columns
+    assert Query('users') is not Query('users')
+    assert Query('users', ['id']).columns == ['id']
+    Query.pool.discard('users')
+    assert len(Query.pool) == 0
+
+def test_pooled_subclasses_and_bad_targets():
+    @pooled
+    class Base:
+        def __init__(self, x):
+            self.x = x
+    class Child(Base):...
+    assert Child(1) is not Child(1)
+    assert Child(1).x == 1
+    with pytest.raises(TypeError):
+        pooled(maxsize=2)(lambda: None)
+
+def test_pooled_creates_each_instance_once():
+    created = []
+    @pooled
+    class Slow:
+        def __init__(self, key):
+            created.append(key)
+            time.sleep(0.05)
+    threads = [threading.Thread(target=Slow, args=(i % 2,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(created) == [0, 1]
+
+@pytest.mark.parametrize('policy', ['lru', 'lfu'])
+def test_memoize(policy):
+    calls = []
+    @memoize(policy, maxsize=2)
+    def square(x, scale=1):
+        calls.append(x)
+        return x * x * scale
+    assert [square(2), square(2), square(2, scale=2), square(2, scale=2)] == [4, 4, 8, 8]
+    assert calls == [2, 2]
+    square.invalidate(2)
+    assert square(2) == 4
+    assert calls == [2, 2, 2]
+    assert square.stats()['hits'] == 2
+    square.clear()
+    assert len(square.cache) == 0
+
+def test_memoize_bare_and_custom_key():
+    @memoize
+    def identity(x):
+        return object()
+    assert identity(1) is identity(1)
+    @memoize(key=lambda p: p.args[0].lower())
+    def fetch(name, session=None):
+        return object()
+    assert fetch('Ann') is fetch('ANN', session=1)
+
+def test_argument_binding_matches_unpacking():
+    f = lambda *args, **kwargs: (args, kwargs)
+    for bound_args, bound_kwargs in [((), {}), ((1,), {}), ((1,), {'a': 1})]:
+        alias = Alias(f, *bound_args, **bound_kwargs)
+        bundle = params(*bound_args, **bound_kwargs)
+        for args, kwargs in [((), {}), ((2,), {}), ((2,), {'a': 2, 'b': 3})]:
+            assert alias(*args, **kwargs) == f(*bound_args, *args, **{**bound_kwargs, **kwargs})
+        assert bundle.invoke(f) == f(*bound_args, **bound_kwargs)
+    assert Alias(f, params(1, a=2))() == ((1,), {'a': 2})
+
+class _Settings:
+    @lazy_evaluate
+    def table():
+        _Settings.calls += 1
+        time.sleep(0.05)
+        return {'a': 1}
+    calls = 0
+
+def test_lazy_evaluate_computes_once():
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(_Settings.table)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [{'a': 1}] * 4
+    assert _Settings.calls == 1
+    # The placeholder was replaced by the value.
+    assert _Settings.__dict__['table'] == {'a': 1}
+    assert any(name.endswith('table') for name in lazy_timings())
+
+def test_lazy_evaluate_module_global(tmp_path, monkeypatch):
+    (tmp_path / 'lazyglobal.py').write_text(
+        'from toolbox.decorators import lazy_evaluate\n'
+        'calls = 0\n'
+        '@lazy_evaluate\n'
+        'def value():\n'
+        '    global calls\n'
+        '    calls += 1\n'
+        '    return 42\n'
+        .replace('toolbox', __package__.rpartition('.')[0])
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import lazyglobal
+    try:
+        assert lazyglobal.calls == 0
+        assert lazyglobal.value == 42
+        from lazyglobal import value
+        assert value == 42
+        assert lazyglobal.calls == 1
+        assert lazyglobal.__dict__['value'] == 42
+    finally:
+        del sys.modules['lazyglobal']
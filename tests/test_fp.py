@@ -0,0 +1,313 @@
+import random
+import threading
+import time
+import pytest
+from .. import fp
+from ..container import LazySeq
+
+def test_conditional_exact_matches_plain():
+    target = lambda x, y=2: (x, y)
+    # Only given `y` when the caller passes it.
+    predicate = lambda x, y=0: x > y
+    plain = fp.conditional(predicate)(target)
+    exact = fp.conditional(predicate, exact=True)(target)
+    for args in [(3,), (-1,), (3, 5), (3, 1)]:
+        assert exact(*args) == plain(*args)
+    assert exact(3, y=4) == plain(3, y=4) == None
+    with pytest.raises(TypeError):
+        fp.conditional(lambda x: x > 0, exact=True)(target)(3, 5)
+
+def test_prefixargs_and_appendargs():
+    f = lambda *args, **kwargs: (args, kwargs)
+    assert fp.prefixargs(f, 1, a=1)(2, a=2, b=3) == ((1, 2), {'a': 2, 'b': 3})
+    assert fp.appendargs(f, 3)(1, 2) == ((1, 2, 3), {})
+    assert fp.appendargs(f, b=1)(a=2) == ((), {'a': 2, 'b': 1})
+    assert fp.appendargs(f)(1) == ((1,), {})
+    assert fp.prefixargs(f).__name__ == f.__name__
+
+def test_prefixargs_binds_as_a_method():
+    f = lambda *args: args
+    class A:
+        prefixed = fp.prefixargs(f, 1)
+        plain = fp.appendargs(f)
+    a = A()
+    assert a.prefixed(2) == (1, a, 2)
+    assert a.plain(2) == (a, 2)
+    assert A.prefixed(2) == (1, 2)
+
+def test_conditional_cache_evaluates_each_key_once():
+    calls = []
+    started = threading.Barrier(8)
+    def slow(x):
+        calls.append(x)
+        time.sleep(0.05)
+        return True
+    @fp.conditional(slow, cache=True)
+    def f(x):
+        return x
+    def call(x):
+        started.wait()
+        for _ in range(20):
+            f(x)
+    threads = [threading.Thread(target=call, args=(i % 2,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(calls) == [0, 1]
+
+def test_conditional_cache_evaluates_keys_in_parallel():
+    def slow(x):
+        time.sleep(0.2)
+        return True
+    f = fp.conditional(slow, cache=True)(lambda x: x)
+    threads = [threading.Thread(target=f, args=(i,)) for i in range(4)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.perf_counter() - start < 0.6
+
+def test_conditional_cache_invalidate_and_errors():
+    results = [ValueError(), False, True]
+    def predicate():
+        result = results.pop()
+        if isinstance(result, Exception):
+            raise result
+        return result
+    f = fp.conditional(predicate, False, cache=True)(lambda: 'called')
+    assert f() == 'called'
+    assert f() == 'called'
+    f.invalidate()
+    assert f() is None
+    f.invalidate()
+    with pytest.raises(ValueError):
+        f()
+
+@pytest.mark.parametrize('options, error', [
+    ({'cache': None}, TypeError),
+    ({'cache': True, 'maxsize': 0}, ValueError),
+    ({'cache': -1}, ValueError),
+])
+def test_conditional_cache_rejects_bad_options(options, error):
+    with pytest.raises(error):
+        fp.conditional(bool, **options)(lambda x: x)
+
+@pytest.mark.parametrize('mode', ['bloom', 'compact', 'index', 'auto'])
+def test_membership_modes_match_plain(mode):
+    collection = [*range(0, 2000, 3), 'a', 'bc', (1, 2), None, 2.5]
+    values = [*range(-10, 2010), 'a', 'b', 'bc', (1, 2), (2, 1), None, 2.5, 3.5]
+    plain_present, plain_absent = fp.present(collection, mode=None), fp.absent(collection, mode=None)
+    present = fp.present(collection, mode=mode, error_rate=1e-9)
+    absent = fp.absent(collection, mode=mode, error_rate=1e-9)
+    assert [present(value) for value in values] == [plain_present(value) for value in values]
+    assert [absent(value) for value in values] == [plain_absent(value) for value in values]
+    assert present.stats()['mode'] == mode
+
+def test_membership_snapshot_modes():
+    allowed = [1, 2, 3, 4, 5, 6, 7, 8, 9]
+    live = fp.present(allowed)
+    snapshot = fp.present(allowed, mode='index')
+    allowed.append(10)
+    assert live(10)
+    assert not snapshot(10)
+
+def test_compact_hash_set_dedupes():
+    from ..container import CompactHashSet
+    hashes = CompactHashSet([3, 1, 3, 'a', 1, 'a'])
+    assert len(hashes) == 3
+    assert list(hashes.hashes) == sorted(hashes.hashes)
+    assert 3 in hashes and 'a' in hashes and 2 not in hashes
+    assert len(CompactHashSet()) == 0
+
+def test_pacer_backs_off_and_resets():
+    pacer = fp.Pacer(1, maxinterval=4)
+    assert [pacer.next(None), pacer.next(None), pacer.next(None), pacer.next(1), pacer.next(1)] == [2, 4, 4, 1, 2]
+
+@pytest.mark.parametrize('options', [{'interval': 0}, {'interval': -1}, {'interval': 2, 'maxinterval': 1}, {'backoff': 0.5}, {'jitter': 1}])
+def test_pacer_rejects_bad_options(options):
+    with pytest.raises(ValueError):
+        fp.Pacer(**options)
+
+def test_yieldpaced_keeps_a_given_pacer_state():
+    pacer = fp.Pacer(0.001, maxinterval=1)
+    pacer.current = 0.5
+    results = iter([1, None])
+    stop = threading.Event()
+    paced = fp.yieldpaced(lambda: next(results), pace=pacer, stop=stop)
+    assert next(paced) == 1
+    assert pacer.current == 0.5
+    stop.set()
+    assert list(paced) == []
+    assert pacer.current == 0.001
+
+def test_yieldpaced_until():
+    values = iter(range(10))
+    assert list(fp.yieldpaced(lambda: next(values), pace=0.001, until=fp.eq(3))) == [0, 1, 2, 3]
+
+def _callstack_stages():
+    def pair(*args, **kwargs):
+        return args, kwargs
+    return [
+        lambda *args, **kwargs: len(args) + len(kwargs),
+        lambda *args, **kwargs: None,
+        lambda *args, **kwargs: args,
+        lambda *args, **kwargs: kwargs,
+        lambda *args, **kwargs: {'n': len(args)},
+        pair,
+        fp.callstackfn(lambda *args: sum(map(len, map(str, args)))),
+        fp.callstackfn(lambda *args, **kwargs: args, pass_kwargs=True),
+        (1, 2),
+        {'k': 3},
+        ((4,), {'j': 5}),
+        'x',
+        (),
+        {},
+    ]
+
+@pytest.mark.parametrize('seed', range(200))
+def test_compiled_callstack_matches_interpreted(seed):
+    rng = random.Random(seed)
+    stack = rng.choices(_callstack_stages(), k=rng.randint(1, 6))
+    if not callable(stack[0]):
+        stack.insert(0, fp.passalong)
+    interpreted = fp.callstack(*stack)
+    compiled = fp.callstack(*stack, compile=True)
+    for args, kwargs in [((), {}), ((1,), {}), ((1, 2), {'a': 3})]:
+        try:
+            expected = interpreted(*args, **kwargs)
+        except TypeError as error:
+            with pytest.raises(type(error)):
+                compiled(*args, **kwargs)
+        else:
+            assert compiled(*args, **kwargs) == expected
+
+def test_callstack_compiles_from_an_iterator():
+    stack = iter([lambda x: x + 1, (10,), lambda x, y: x * y])
+    assert fp.callstack(stack, compile=True)(1) == (20,)
+
+@pytest.mark.parametrize('cls, check', [
+    (fp.startswith_any, str.startswith),
+    (fp.endswith_any, str.endswith),
+])
+def test_affixes_match_naive(cls, check):
+    rng = random.Random(0)
+    patterns = ['', 'a', 'ab', 'abc', 'b', 'ca', 'bca', 'cc']
+    for _ in range(200):
+        chosen = rng.sample(patterns[1:], rng.randint(1, 4))
+        s = ''.join(rng.choices('abc', k=rng.randint(0, 6)))
+        matcher = cls(chosen)
+        matches = [pattern for pattern in chosen if check(s, pattern)]
+        assert matcher(s) == bool(matches)
+        assert matcher.match(s) == (max(matches, key=len) if matches else None)
+
+def test_contains_any_matches_naive():
+    rng = random.Random(1)
+    patterns = ['a', 'ab', 'bab', 'abc', 'cc', 'bca', 'cab']
+    for _ in range(300):
+        chosen = rng.sample(patterns, rng.randint(1, 4))
+        s = ''.join(rng.choices('abc', k=rng.randint(0, 10)))
+        matcher = fp.contains_any(chosen)
+        expected = sorted(
+            (start, pattern) for pattern in chosen for start in range(len(s)) if s.startswith(pattern, start)
+        )
+        assert matcher(s) == bool(expected)
+        assert sorted(matcher.findall(s)) == expected
+        if expected:
+            end = min(start + len(pattern) for start, pattern in expected)
+            assert matcher.search(s) == max((p for start, p in expected if start + len(p) == end), key=len)
+        else:
+            assert matcher.search(s) is None
+    assert fp.contains_any(['']).findall('ab') == [(0, '')]
+
+def test_windows_match_naive():
+    rng = random.Random(2)
+    values = [rng.randint(-50, 50) for _ in range(60)]
+    for size in (1, 2, 5, 60, 61):
+        windows = [tuple(values[i:i + size]) for i in range(len(values) - size + 1)]
+        assert list(fp.sliding(values, size)) == windows
+        assert list(fp.sliding(values, size, 3)) == windows[::3]
+        assert list(fp.rollingsum(values, size)) == list(map(sum, windows))
+        assert list(fp.rollingmean(values, size)) == pytest.approx([sum(w) / size for w in windows])
+        assert list(fp.rollingmin(values, size)) == list(map(min, windows))
+        assert list(fp.rollingmax(values, size, key=abs)) == [max(w, key=abs) for w in windows]
+        assert list(fp.tumbling(values, size)) == [tuple(values[i:i + size]) for i in range(0, len(values), size)]
+    assert list(fp.tumbling(range(5), 2, partial=False)) == [(0, 1), (2, 3)]
+    assert list(fp.sessions([1, 2, 5, 6, 10], 1)) == [[1, 2], [5, 6], [10]]
+    assert fp.topk(values, 3) == sorted(values, reverse=True)[:3]
+    for window in (fp.sliding, fp.rollingsum, fp.rollingmin, fp.tumbling):
+        with pytest.raises(ValueError):
+            list(window(values, 0))
+
+def test_nth_and_last_on_iterators():
+    seq = LazySeq(iter(range(10)), chunksize=3)
+    assert [fp.nth(n, seq) for n in (0, 4, 9, 10, -1, -10, -11)] == [0, 4, 9, None, 9, 0, None]
+    assert fp.last(seq) == 9
+    assert fp.last(LazySeq(iter([]))) is None
+    assert fp.last(iter(range(4))) == 3
+    assert fp.last(iter([])) is None
+    assert fp.nth(2, iter('abc')) == 'c'
+
+@pytest.mark.parametrize('executor', ['thread', None])
+@pytest.mark.parametrize('ordered', [True, False])
+def test_parallel_do_matches_sequential(executor, ordered):
+    done = []
+    lock = threading.Lock()
+    def action(a, b=0):
+        with lock:
+            done.append(a + b)
+    items = [(i, i) if i % 2 else i for i in range(50)]
+    fp.do(action, items, executor=executor, workers=3, chunksize=4, ordered=ordered)
+    expected = []
+    fp.do(lambda a, b=0: expected.append(a + b), items)
+    assert sorted(done) == sorted(expected)
+
+def _check_positive(value):
+    if value < 0:
+        raise ValueError(value)
+
+def test_parallel_do_in_processes():
+    fp.do(_check_positive, range(20), executor='process', workers=2, chunksize=5)
+    with pytest.raises(ValueError):
+        fp.do(_check_positive, [1, 2, -3, 4], executor='process', workers=2)
+
+def test_parallel_do_with_an_executor_and_backpressure():
+    import concurrent.futures
+    pulled = []
+    def source():
+        for i in range(40):
+            pulled.append(i)
+            yield i
+    seen = []
+    gate = threading.Event()
+    def action(item):
+        gate.wait()
+        seen.append(item)
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        thread = threading.Thread(target=fp.do, args=(action, source()), kwargs={'executor': executor, 'maxpending': 2})
+        thread.start()
+        time.sleep(0.1)
+        # Only the chunks in flight, plus the one waiting to be submitted, have been pulled.
+        assert len(pulled) <= 3
+        gate.set()
+        thread.join()
+    assert sorted(seen) == list(range(40))
+
+def test_parallel_do_raises_the_first_error_in_order():
+    def action(item):
+        if item in (3, 7):
+            raise ValueError(item)
+    with pytest.raises(ValueError) as raised:
+        fp.do(action, range(10), executor='thread', workers=4)
+    assert raised.value.args == (3,)
+
+@pytest.mark.parametrize('options', [
+    {'executor': 'fiber'}, {'executor': 'thread', 'chunksize': 0},
+    {'executor': 'thread', 'maxpending': 0}, {'executor': 'thread', 'workers': 0},
+])
+def test_parallel_do_rejects_bad_options_without_a_pool(options):
+    before = threading.active_count()
+    with pytest.raises(ValueError):
+        fp.do(print, [1], **options)
+    assert threading.active_count() == before
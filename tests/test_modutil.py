@@ -0,0 +1,125 @@
+import os
+import subprocess
+import sys
+import importlib
+import time
+import pytest
+from ..modutil import ExportIndex, HotReloader, ImportProfiler, is_loaded, lazy_import
+
+PACKAGE = __package__.rpartition('.')[0]
+
+def run(script: str) -> str:
+    return subprocess.run(
+        [sys.executable, '-c', script.format(package=PACKAGE)], check=True, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+    ).stdout.strip()
+
+def test_interactive_import_leaves_out_heavy_modules():
+    loaded = run(
+        'import sys; from {package}.interactive import *; from {package}.modutil import is_loaded; '
+        'print(sorted(m for m in ("numpy", "json", "pickle", "tempfile", "tracemalloc", "sqlite3", "hashlib") if is_loaded(m)))'
+    )
+    assert loaded == '[]'
+
+def test_import_profiler_records_memory():
+    sys.modules.pop('colorsys', None)
+    with ImportProfiler(memory=True) as profiler:
+        import colorsys
+    nodes = {node.name: node for _, node in profiler.nodes()}
+    assert nodes['colorsys'].memory is not None
+    assert nodes['colorsys'].seconds > 0
+
+def test_lazy_import_runs_on_first_use():
+    sys.modules.pop('colorsys', None)
+    module = lazy_import('colorsys')
+    assert sys.modules['colorsys'] is module
+    assert not is_loaded('colorsys')
+    assert module.rgb_to_hsv(1, 0, 0) == (0.0, 1.0, 1)
+    assert is_loaded(module)
+    assert lazy_import('colorsys') is module
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import('no_such_module_here')
+
+@pytest.fixture
+def hotpkg(tmp_path, monkeypatch):
+    root = tmp_path / 'hotpkg'
+    root.mkdir()
+    (root / '__init__.py').write_text('')
+    (root / 'base.py').write_text('def value():\n    return 1\n')
+    (root / 'user.py').write_text('from .base import value\ndef doubled():\n    return value() * 2\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import hotpkg.user
+    yield root
+    for name in [name for name in sys.modules if name == 'hotpkg' or name.startswith('hotpkg.')]:
+        del sys.modules[name]
+
+def rewrite(path, text: str):
+    stat = path.stat()
+    path.write_text(text)
+    # Make sure the change is seen even on coarse file system clocks.
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    importlib.invalidate_caches()
+
+def test_hot_reloader_reloads_dependents(hotpkg):
+    from hotpkg.base import value
+    namespace = {'value': value}
+    reload = HotReloader('hotpkg', namespaces=[namespace])
+    assert reload() == []
+    assert reload.graph()['hotpkg.user'] == {'hotpkg.base'}
+    # Touching a file without changing it isn't a change.
+    rewrite(hotpkg / 'base.py', (hotpkg / 'base.py').read_text())
+    assert reload() == []
+    rewrite(hotpkg / 'base.py', 'def value():\n    return 5\n')
+    assert reload() == ['hotpkg.base', 'hotpkg.user']
+    assert sys.modules['hotpkg.user'].doubled() == 10
+    assert namespace['value']() == 5
+
+def test_hot_reloader_rebind_only(hotpkg):
+    user = sys.modules['hotpkg.user']
+    reload = HotReloader('hotpkg', rebind_only=True, namespaces=[])
+    rewrite(hotpkg / 'base.py', 'def value():\n    return 3\n')
+    assert reload() == ['hotpkg.base']
+    assert sys.modules['hotpkg.user'] is user
+    assert user.doubled() == 6
+
+def test_hot_reloader_failure_part_way(hotpkg):
+    from hotpkg.base import value
+    namespace = {'value': value}
+    reload = HotReloader('hotpkg', namespaces=[namespace])
+    rewrite(hotpkg / 'base.py', 'def value():\n    return 7\n')
+    rewrite(hotpkg / 'user.py', 'raise RuntimeError("broken")\n')
+    with pytest.raises(RuntimeError):
+        reload()
+    # What was reloaded before the error is still rebound.
+    assert namespace['value']() == 7
+    # The module that failed is tried again.
+    rewrite(hotpkg / 'user.py', 'from .base import value\ndef doubled():\n    return value() * 2\n')
+    assert reload() == ['hotpkg.user']
+    assert sys.modules['hotpkg.user'].doubled() == 14
+
+def test_export_index_matches_the_imported_modules(tmp_path):
+    cache = tmp_path / 'exports.json'
+    index = ExportIndex(str(cache))
+    # fp is left out: `@__all__` over an `@overload` stub includes typing's placeholder.
+    for name in ('container', 'stream', 'predicate', 'decorators', 'profiling'):
+        module = importlib.import_module(f'{PACKAGE}.{name}')
+        exports = index.exports(module.__name__)
+        assert exports.explicit
+        assert set(exports.names) == set(module.__all__)
+    assert index.find('Stream', [f'{PACKAGE}.fp', f'{PACKAGE}.stream']) == f'{PACKAGE}.stream'
+    index.save()
+    cached = ExportIndex(str(cache))
+    assert cached.exports(f'{PACKAGE}.fp') == index.exports(f'{PACKAGE}.fp')
+
+def test_export_index_scan():
+    source = (
+        'from toolbox.modutil import Includer\n'
+        '__all__ = (include := Includer("a"))\n'
+        '@include\n'
+        'def b():...\n'
+        '@include(alias="d")\n'
+        'class c:...\n'
+        'include.include("e")\n'
+    )
+    assert ExportIndex.scan(source) == (('a', 'b', 'd', 'e'), True, False)
+    assert ExportIndex.scan('x = 1\n_y = 2\ndef z():...\n') == (('x', 'z'), False, False)
@@ -0,0 +1,83 @@
+import random
+import pytest
+from .. import fp, predicate
+
+LEAVES = [
+    fp.eq(3), fp.ne(0), fp.lt(2), fp.le(2), fp.gt(5), fp.ge(5), fp.is_(None), fp.is_not(None),
+    fp.is_none, fp.not_none, fp.present({1, 3, 5}), fp.absent((1, 2, 3, 4, 5, 6, 7, 8, 9)),
+    fp.present([4, 6]), lambda value: value == 7, bool,
+]
+VALUES = [*range(-2, 11), None]
+
+def evaluate(tree, value):
+    """Interprets the tree with the plain `fp` predicates."""
+    match tree:
+        case ('and', parts):
+            return all(evaluate(part, value) for part in parts)
+        case ('or', parts):
+            return any(evaluate(part, value) for part in parts)
+        case ('not', part):
+            return not evaluate(part, value)
+        case leaf:
+            return bool(leaf(value))
+
+def compile_tree(tree):
+    match tree:
+        case ('and', parts):
+            return predicate.matchall(*map(compile_tree, parts))
+        case ('or', parts):
+            return predicate.matchany(*map(compile_tree, parts))
+        case ('not', part):
+            return ~compile_tree(part)
+        case leaf:
+            return predicate.lift(leaf)
+
+def random_tree(rng, depth=0):
+    if depth > 2 or rng.random() < 0.3:
+        return rng.choice(LEAVES)
+    kind = rng.choice(['and', 'or', 'not'])
+    if kind == 'not':
+        return ('not', random_tree(rng, depth + 1))
+    return (kind, [random_tree(rng, depth + 1) for _ in range(rng.randint(1, 3))])
+
+def outcome(fn, value):
+    try:
+        return fn(value)
+    except TypeError:
+        return TypeError
+
+@pytest.mark.parametrize('seed', range(200))
+def test_compiled_predicate_matches_interpreted(seed):
+    tree = random_tree(random.Random(seed))
+    compiled = compile_tree(tree)
+    for value in VALUES:
+        expected = outcome(lambda value: evaluate(tree, value), value)
+        assert outcome(compiled, value) == expected
+        assert outcome(compiled.function, value) == expected
+
+def test_compiled_matchall_matches_fp():
+    predicates = [fp.lt(0), fp.present({1, 2, 3, 9}), fp.ne(9)]
+    compiled_all, plain_all = predicate.matchall(*predicates), fp.matchall(*predicates)
+    compiled_any, plain_any = predicate.matchany(*predicates), fp.matchany(*predicates)
+    for value in range(-5, 15):
+        assert compiled_all(value) == plain_all(value)
+        assert compiled_any(value) == plain_any(value)
+    assert predicate.matchall()(0) is True
+    assert predicate.matchany()(0) is False
+
+def test_operators_combine_with_plain_callables():
+    check = (predicate.lt(0) & fp.present({1, 2})) | (lambda value: value == -1)
+    assert [value for value in range(-2, 4) if check(value)] == [-1, 1, 2]
+    assert [value for value in range(-2, 4) if (~check)(value)] == [-2, 0, 3]
+    assert (~~check).node == check.node
+
+def test_string_predicates():
+    for value in ['abc', 'xbc', 'ab', '']:
+        assert predicate.startswith('ab')(value) == fp.startswith('ab')(value)
+        assert predicate.endswith('bc')(value) == fp.endswith('bc')(value)
+    assert predicate.istype(bool)(True) and not predicate.istype(int)(True)
+    assert predicate.instanceof(int)(True)
+
+def test_lift_rejects_non_callables():
+    with pytest.raises(TypeError):
+        predicate.lift(3)
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import threading
+import pytest
+from .. import profiling
+from ..profiling import profiled
+
+@pytest.fixture(autouse=True)
+def enabled():
+    profiling.enable()
+    yield
+    profiling.enable()
+
+def test_profiled_counts_calls_and_errors():
+    @profiled
+    def work(x):
+        if x < 0:
+            raise ValueError(x)
+        return x * 2
+    work.profile.reset()
+    assert [work(x) for x in range(5)] == [0, 2, 4, 6, 8]
+    with pytest.raises(ValueError):
+        work(-1)
+    stats = work.profile.stats()
+    assert stats['name'].endswith('test_profiled_counts_calls_and_errors.<locals>.work')
+    assert (stats['calls'], stats['errors']) == (6, 1)
+    assert sum(stats['histogram'].values()) == 6
+    assert stats['p50_ns'] <= stats['p99_ns'] <= max(stats['histogram'])
+    assert stats['max_ns'] <= stats['total_ns']
+
+def test_profiled_merges_threads_and_names():
+    @profiled(name='tests.shared')
+    def first():...
+    @profiled(name='tests.shared')
+    def second():...
+    assert first.profile is second.profile is profiling.profile('tests.shared')
+    first.profile.reset()
+    threads = [threading.Thread(target=lambda: [first() for _ in range(100)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    second()
+    assert first.profile.stats()['calls'] == 401
+
+def test_profiled_coroutine():
+    @profiled
+    async def work():
+        await asyncio.sleep(0)
+        return 1
+    work.profile.reset()
+    assert asyncio.run(work()) == 1
+    assert work.profile.stats()['calls'] == 1
+
+def test_disable_calls_straight_through():
+    @profiled
+    def work():
+        return 1
+    work.profile.reset()
+    profiling.disable()
+    assert not profiling.enabled()
+    assert work() == 1
+    assert work.profile.stats()['calls'] == 0
+
+def test_trace_memory_samples_every_nth_call():
+    @profiled(trace_memory=2)
+    def allocate():
+        return bytearray(100_000)
+    allocate.profile.reset()
+    kept = [allocate() for _ in range(4)]
+    memory = allocate.profile.stats()['memory']
+    assert memory['sampled'] == 2
+    assert memory['allocated_bytes'] >= 2 * 100_000
+    assert memory['peak_bytes'] >= 100_000
+    import tracemalloc
+    assert not tracemalloc.is_tracing()
+    del kept
+
+def test_report_and_dump(tmp_path):
+    @profiled(name='tests.report')
+    def work():...
+    work.profile.reset()
+    work()
+    assert 'tests.report' in profiling.report(sort='name')
+    assert len(profiling.report(limit=1).splitlines()) == 2
+    path = tmp_path / 'profile.json'
+    text = profiling.dump(str(path))
+    assert json.loads(path.read_text()) == json.loads(text)
+    assert json.loads(text)['functions']['tests.report']['calls'] == 1
+    profiling.reset()
+    assert profiling.snapshot()['tests.report']['calls'] == 0
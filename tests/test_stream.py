@@ -0,0 +1,99 @@
+import itertools
+import random
+import pytest
+from .. import fp
+from ..stream import Stream
+
+SOURCE = [0, 1, None, 'a', 2, '', 3.5, None, 4, 5, 'bc', 6, 0, 7, 8, None, 9]
+
+STAGES = [
+    ('filter', None),
+    ('filter', lambda value: not isinstance(value, int) or value % 2 == 0),
+    ('filterfalse',),
+    ('filternone',),
+    ('filtertype', int),
+    ('map', repr),
+    ('map', lambda value: value * 2 if isinstance(value, (int, float)) else value),
+    ('yieldinstead', 7),
+    ('skip', 0),
+    ('skip', 2),
+    ('take', 0),
+    ('take', 1),
+    ('take', 3),
+    ('take', 100),
+]
+
+def interpreted(source, stages):
+    """What the stages do when each is a separate generator from `fp` or `itertools`."""
+    it = iter(source)
+    for stage in stages:
+        match stage:
+            case ('filter', predicate):
+                it = filter(predicate, it)
+            case ('filterfalse',):
+                it = fp.filterfalse(it)
+            case ('filternone',):
+                it = fp.filternone(it)
+            case ('filtertype', cls):
+                it = fp.filtertype(cls, it)
+            case ('map', fn):
+                it = map(fn, it)
+            case ('yieldinstead', value):
+                it = fp.yieldinstead(it, value)
+            case ('skip', n):
+                it = itertools.islice(it, n, None)
+            case ('take', n):
+                it = itertools.islice(it, n)
+    return list(it)
+
+def build(source, stages, batchsize=None):
+    stream = Stream(source)
+    if batchsize is not None:
+        stream = stream.batched(batchsize)
+    for name, *args in stages:
+        stream = getattr(stream, name)(*args)
+    return stream
+
+@pytest.mark.parametrize('seed', range(200))
+def test_compiled_stream_matches_interpreted(seed):
+    rng = random.Random(seed)
+    stages = rng.choices(STAGES, k=rng.randint(0, 6))
+    expected = interpreted(SOURCE, stages)
+    for batchsize in (None, 1, 3, 100):
+        assert build(SOURCE, stages, batchsize).list() == expected
+        assert build(iter(SOURCE), stages, batchsize).list() == expected
+
+def test_take_stops_pulling_from_the_source():
+    pulled = []
+    def source():
+        for value in itertools.count():
+            pulled.append(value)
+            yield value
+    assert Stream(source()).filter(lambda value: value % 2).take(3).list() == [1, 3, 5]
+    assert pulled == list(range(6))
+
+def test_terminal_operations():
+    stream = Stream(range(10)).filter(lambda value: value % 3)
+    assert stream.count() == 6
+    assert stream.count(fp.gt(5)) == 3
+    assert stream.first() == 1
+    assert stream.first(fp.lt(5)) == 7
+    assert stream.last() == 8
+    assert Stream([]).last() is None
+    assert Stream([1, 2]).take(0).last() is None
+
+def test_map_batches():
+    sizes = []
+    def double(batch):
+        sizes.append(len(batch))
+        return [value * 2 for value in batch]
+    assert Stream(range(5)).map_batches(double).list() == [0, 2, 4, 6, 8]
+    assert sizes == [5]
+    sizes.clear()
+    assert Stream(range(10)).batched(4).filter(fp.ne(0)).map_batches(double).take(5).list() == [2, 4, 6, 8, 10]
+    assert sizes == [3, 4]
+    assert Stream([]).map_batches(double).list() == []
+
+def test_batched_rejects_bad_sizes():
+    with pytest.raises(ValueError):
+        Stream([]).batched(0)